@@ -0,0 +1,87 @@
+# account.py - in-memory mirror of the broker account (balance, open stakes, realized P/L)
+import threading
+import time
+
+
+class AccountMirror:
+    """
+    Local copy of the account so the trading hot path never waits on get_balance.
+
+    The balance moves with the bot's own events: an accepted order debits its
+    stake, a win credits stake + profit, a loss leaves the debit in place.
+    Deposits, withdrawals and trades placed outside the bot only show up through
+    reconcile(), which replaces the local balance with the broker's every
+    `reconcile_interval` seconds (sooner after an unknown trade result); if a
+    local event lands while that request is in flight the answer is discarded
+    and retried later.
+    """
+
+    def __init__(self, conn, start_balance=0.0, reconcile_interval=60):
+        self.conn = conn
+        self.reconcile_interval = float(reconcile_interval)
+        self.lock = threading.Lock()
+        self.balance = float(start_balance)
+        self.open_stakes = {}
+        self.realized = 0.0
+        self.version = 0
+        self.synced = False
+        self.next_reconcile = 0.0
+        self.reconciles = 0
+        self.last_drift = 0.0
+
+    def _changed(self):
+        self.version += 1
+
+    def on_order(self, order_id, amount):
+        with self.lock:
+            self.open_stakes[order_id] = float(amount)
+            self.balance -= float(amount)
+            self._changed()
+
+    def on_result(self, order_id, result, profit):
+        """Settle an order with the ledger's profit ('win' profit > 0, 'loss' = -stake)."""
+        with self.lock:
+            amount = self.open_stakes.pop(order_id, 0.0)
+            if result == 'win':
+                self.balance += amount + profit
+            elif result != 'loss':
+                # unknown outcome: the local balance can't be trusted until reconciled
+                self.next_reconcile = 0.0
+            self.realized += profit
+            self._changed()
+
+    def due(self, now=None):
+        return (time.time() if now is None else now) >= self.next_reconcile
+
+    def reconcile(self):
+        """Fetch the broker balance (one RPC). Returns True if the mirror was updated."""
+        with self.lock:
+            version = self.version
+            self.next_reconcile = time.time() + self.reconcile_interval
+        try:
+            balance = float(self.conn.get_balance())
+        except Exception as e:
+            print(f"⚠️ Balance reconcile failed: {e}")
+            return False
+        with self.lock:
+            if self.version != version:
+                self.next_reconcile = 0.0
+                return False
+            if self.synced:
+                self.last_drift = balance - self.balance
+            self.balance = balance
+            self.synced = True
+            self.reconciles += 1
+            return True
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'balance': self.balance,
+                'open_stake': sum(self.open_stakes.values()),
+                'open_orders': len(self.open_stakes),
+                'realized': self.realized,
+                'synced': self.synced,
+                'reconciles': self.reconciles,
+                'last_drift': self.last_drift,
+            }
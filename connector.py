@@ -1,6 +1,8 @@
 # connector.py (supports digital & binary attempts + check result)
 import time, traceback
 import os, sys
+import itertools
+import threading
 
 if getattr(sys, 'frozen', False):
     BASE_DIR = sys._MEIPASS
@@ -11,6 +13,7 @@ else:
 # example_path = os.path.join(BASE_DIR, 'algún_archivo.json')
 
 from iqoptionapi.stable_api import IQ_Option
+from ratelimit import Endpoint, CircuitOpenError
 
 class IQConnector:
     def __init__(self, email, password, mode='PRACTICE'):
@@ -38,100 +41,156 @@ class IQConnector:
         return True
 
     def get_all_assets(self):
-    """
-    Return a list of OTC assets that are actually available/open.
-    Strategy:
-     - Prefer using self.Iq.get_all_open_time() (most reliable).
-     - If that fails, fallback to older calls (get_all_ACTIVES_OPCODE).
-     - As a last resort return sensible defaults.
-    """
-    try:
-        otc_list = []
-
-        # 1) Try get_all_open_time() first (preferred)
-        all_open = None
+        """
+        Return a list of OTC assets that are actually available/open.
+        Strategy:
+         - Prefer using self.Iq.get_all_open_time() (most reliable).
+         - If that fails, fallback to older calls (get_all_ACTIVES_OPCODE).
+         - As a last resort return sensible defaults.
+        """
         try:
-            if hasattr(self.Iq, 'get_all_open_time'):
-                all_open = self.Iq.get_all_open_time()
-        except Exception:
+            otc_list = []
+
+            # 1) Try get_all_open_time() first (preferred)
             all_open = None
+            try:
+                if hasattr(self.Iq, 'get_all_open_time'):
+                    all_open = self.Iq.get_all_open_time()
+            except Exception:
+                all_open = None
 
-        if isinstance(all_open, dict):
-            # The structure can vary by wrapper version, be flexible
-            for key, info in all_open.items():
-                # Build candidate normalized names
-                candidates = [key, f"{key}-OTC", key.upper(), f"{key.upper()}-OTC"]
-                # Inspect info: it may be a dict of timeframes -> { 'open': True/False } etc.
-                found_open = False
-                # check whether any nested entry declares open=True
-                if isinstance(info, dict):
-                    # If the dict itself has an 'open' key
-                    if info.get('open') is True:
-                        found_open = True
-                    else:
-                        # otherwise check nested dictionaries
-                        for subv in info.values():
-                            if isinstance(subv, dict) and subv.get('open') is True:
-                                found_open = True
-                                break
-                # If we found 'open', normalize name to <PAIR>-OTC
-                if found_open:
-                    # prefer explicit -OTC form
-                    name = f"{key}-OTC"
-                    if name not in otc_list:
-                        otc_list.append(name)
-
-            # If we found items via get_all_open_time, return them (limit to avoid overload)
-            if otc_list:
-                return otc_list[:30]
-
-        # 2) Fallback: try older API call get_all_ACTIVES_OPCODE
-        try:
-            if hasattr(self.Iq, 'get_all_ACTIVES_OPCODE'):
-                actives = self.Iq.get_all_ACTIVES_OPCODE()
-                if isinstance(actives, dict):
-                    for pair in actives.keys():
-                        name = f"{pair}-OTC"
+            if isinstance(all_open, dict):
+                # The structure can vary by wrapper version, be flexible
+                for key, info in all_open.items():
+                    # Build candidate normalized names
+                    candidates = [key, f"{key}-OTC", key.upper(), f"{key.upper()}-OTC"]
+                    # Inspect info: it may be a dict of timeframes -> { 'open': True/False } etc.
+                    found_open = False
+                    # check whether any nested entry declares open=True
+                    if isinstance(info, dict):
+                        # If the dict itself has an 'open' key
+                        if info.get('open') is True:
+                            found_open = True
+                        else:
+                            # otherwise check nested dictionaries
+                            for subv in info.values():
+                                if isinstance(subv, dict) and subv.get('open') is True:
+                                    found_open = True
+                                    break
+                    # If we found 'open', normalize name to <PAIR>-OTC
+                    if found_open:
+                        # prefer explicit -OTC form
+                        name = f"{key}-OTC"
                         if name not in otc_list:
                             otc_list.append(name)
-                    if otc_list:
-                        return otc_list[:30]
-        except Exception:
-            pass
 
-        # 3) Final fallback: sensible defaults
-        defaults = [
-            'EURUSD-OTC','GBPUSD-OTC','USDJPY-OTC','EURJPY-OTC',
-            'GBPJPY-OTC','AUDCAD-OTC','NZDUSD-OTC'
-        ]
-        return defaults
+                # If we found items via get_all_open_time, return them all;
+                # main.py's AssetScheduler decides how often each one is scanned
+                if otc_list:
+                    return otc_list
 
-    except Exception as e:
-        print("Error in get_all_assets:", e)
-        # return safe defaults if anything goes wrong
-        return ['EURUSD-OTC','GBPUSD-OTC','USDJPY-OTC','EURJPY-OTC']
+            # 2) Fallback: try older API call get_all_ACTIVES_OPCODE
+            try:
+                if hasattr(self.Iq, 'get_all_ACTIVES_OPCODE'):
+                    actives = self.Iq.get_all_ACTIVES_OPCODE()
+                    if isinstance(actives, dict):
+                        for pair in actives.keys():
+                            name = f"{pair}-OTC"
+                            if name not in otc_list:
+                                otc_list.append(name)
+                        if otc_list:
+                            return otc_list
+            except Exception:
+                pass
 
-    def get_candles(self, asset, timeframe_seconds=60, count=100):
+            # 3) Final fallback: sensible defaults
+            defaults = [
+                'EURUSD-OTC','GBPUSD-OTC','USDJPY-OTC','EURJPY-OTC',
+                'GBPJPY-OTC','AUDCAD-OTC','NZDUSD-OTC'
+            ]
+            return defaults
+
+        except Exception as e:
+            print("Error in get_all_assets:", e)
+            # return safe defaults if anything goes wrong
+            return ['EURUSD-OTC','GBPUSD-OTC','USDJPY-OTC','EURJPY-OTC']
+
+    def fetch_candles(self, asset, timeframe_seconds=60, count=100):
+        """Like get_candles but lets API errors propagate (used by ConnectorPool)."""
         to = int(time.time())
+        candles = self.Iq.get_candles(asset, timeframe_seconds, count, to)
+        if not candles:
+            return []
+        result = []
+        for c in candles:
+            result.append({
+                'ts': c.get('from', int(time.time())),
+                'open': c.get('open'),
+                'close': c.get('close'),
+                'high': c.get('max', c.get('high')),
+                'low': c.get('min', c.get('low')),
+                'volume': c.get('volume', 0)
+            })
+        return result
+
+    def get_candles(self, asset, timeframe_seconds=60, count=100):
         try:
-            candles = self.Iq.get_candles(asset, timeframe_seconds, count, to)
-            if not candles:
-                return []
-            result = []
-            for c in candles:
-                result.append({
-                    'ts': c.get('from', int(time.time())),
-                    'open': c.get('open'),
-                    'close': c.get('close'),
-                    'high': c.get('max', c.get('high')),
-                    'low': c.get('min', c.get('low')),
-                    'volume': c.get('volume', 0)
-                })
-            return result
+            return self.fetch_candles(asset, timeframe_seconds, count)
         except Exception as e:
             time.sleep(0.5)
             return []
 
+    def get_balance(self):
+        return self.Iq.get_balance()
+
+    def get_server_time(self):
+        # broker clock as last pushed over the websocket (no request)
+        return self.Iq.get_server_timestamp()
+
+    def start_stream(self, asset, size=1, maxdict=300):
+        self.Iq.start_candles_stream(asset, size, maxdict)
+
+    def stop_stream(self, asset, size=1):
+        self.Iq.stop_candles_stream(asset, size)
+
+    def get_realtime_candles(self, asset, size=1, since=0):
+        """Streamed candles with 'from' >= since (the newest one may still be forming)."""
+        try:
+            data = self.Iq.get_realtime_candles(asset, size) or {}
+        except Exception:
+            return []
+        result = []
+        for ts in sorted(data):
+            c = data[ts]
+            ts = c.get('from', ts)
+            if ts < since:
+                continue
+            result.append({
+                'ts': ts,
+                'open': c.get('open'),
+                'close': c.get('close'),
+                'high': c.get('max', c.get('high')),
+                'low': c.get('min', c.get('low')),
+                'volume': c.get('volume', 0)
+            })
+        return result
+
+    def get_payouts(self):
+        """Best-effort {asset: payout fraction} from get_all_profit(); {} if unavailable."""
+        payouts = {}
+        try:
+            if hasattr(self.Iq, 'get_all_profit'):
+                profits = self.Iq.get_all_profit() or {}
+                for key, info in profits.items():
+                    values = info.values() if isinstance(info, dict) else [info]
+                    values = [float(v) for v in values if isinstance(v, (int, float))]
+                    if values:
+                        name = key if key.endswith('-OTC') else f"{key}-OTC"
+                        payouts[name] = max(values)
+        except Exception:
+            pass
+        return payouts
+
     def detect_asset_type(self, asset):
         if asset in self.asset_type_cache:
             return self.asset_type_cache[asset]
@@ -153,44 +212,70 @@ class IQConnector:
         return None
 
     def buy_asset(self, asset, amount, direction, expiration_minutes=1):
-    """
-    Normaliza direction y realiza la compra.
-    direction puede venir como 'CALL','call','Put','PUT' etc.
-    Retorna el objeto respuesta que provea la API (o None).
-    """
-    # Normalize direction to 'call' or 'put'
-    d = str(direction).strip().lower()
-    if d in ('put', 'sell', 'down', 'p'):
-        dir_norm = 'put'
-    else:
-        # default to 'call' for safety
-        dir_norm = 'call'
-
-    # try digital spot first (library-dependent)
-    try:
-        # many wrappers accept ('asset', amount, 'call'/'put', expiration_minutes)
-        resp = None
+        """
+        Normaliza direction y realiza la compra.
+        direction puede venir como 'CALL','call','Put','PUT' etc.
+        Retorna el objeto respuesta que provea la API (o None).
+        """
+        # Normalize direction to 'call' or 'put'
+        d = str(direction).strip().lower()
+        if d in ('put', 'sell', 'down', 'p'):
+            dir_norm = 'put'
+        else:
+            # default to 'call' for safety
+            dir_norm = 'call'
+
+        # try digital spot first (library-dependent)
         try:
-            resp = self.Iq.buy_digital_spot(asset, amount, dir_norm, expiration_minutes)
+            # many wrappers accept ('asset', amount, 'call'/'put', expiration_minutes)
+            resp = None
+            try:
+                resp = self.Iq.buy_digital_spot(asset, amount, dir_norm, expiration_minutes)
+                return resp
+            except Exception:
+                # fallback to classic buy (some wrappers use seconds for expiry)
+                exp_sec = int(expiration_minutes * 60)
+                if hasattr(self.Iq, 'buy'):
+                    try:
+                        return self.Iq.buy(asset, amount, dir_norm, exp_sec)
+                    except Exception:
+                        pass
+                if hasattr(self.Iq, 'buy_option'):
+                    try:
+                        return self.Iq.buy_option(asset, amount, dir_norm, exp_sec)
+                    except Exception:
+                        pass
             return resp
+        except Exception as e:
+            print('Buy failed (connector.buy_asset):', e)
+            return None
+        
+    def get_position_open_time(self, response):
+        """
+        Broker time (seconds) at which the order's position opened, or None if unknown.
+        Reads the order's async messages ('position-changed' for digital, 'option-opened'
+        for binary options); best-effort like check_trade_result.
+        """
+        order_id = None
+        if isinstance(response, tuple) and len(response) == 2 and response[0]:
+            order_id = response[1]
+        elif isinstance(response, dict):
+            order_id = response.get('id') or response.get('order_id')
+        if order_id is None or not hasattr(self.Iq, 'get_async_order'):
+            return None
+        try:
+            messages = self.Iq.get_async_order(order_id) or {}
         except Exception:
-            # fallback to classic buy (some wrappers use seconds for expiry)
-            exp_sec = int(expiration_minutes * 60)
-            if hasattr(self.Iq, 'buy'):
-                try:
-                    return self.Iq.buy(asset, amount, dir_norm, exp_sec)
-                except Exception:
-                    pass
-            if hasattr(self.Iq, 'buy_option'):
-                try:
-                    return self.Iq.buy_option(asset, amount, dir_norm, exp_sec)
-                except Exception:
-                    pass
-        return resp
-    except Exception as e:
-        print('Buy failed (connector.buy_asset):', e)
+            return None
+        for name in ('position-changed', 'option-opened'):
+            msg = (messages.get(name) or {}).get('msg') or {}
+            for key in ('open_time_millisecond', 'open_time'):
+                if msg.get(key):
+                    value = float(msg[key])
+                    # digital positions report milliseconds, binary options seconds
+                    return value / 1000 if value > 1e11 else value
         return None
-        
+
     def check_trade_result(self, response):
         """Attempt to determine if a trade (response) resulted in profit or loss.
         Many wrappers return a dict with 'id' or 'position_id' or a boolean.
@@ -236,3 +321,161 @@ class IQConnector:
         except Exception:
             pass
         return None
+
+
+class ConnectorPool:
+    """
+    Several authenticated IQ Option sessions behind the IQConnector interface.
+    Read-only traffic (candles, open-time) is spread across the read sessions;
+    orders, trade results and balance stay on one dedicated order session.
+    Every endpoint class has its own token bucket and circuit breaker, so callers
+    don't need blind sleeps between requests.
+    """
+
+    # requests/second and burst per endpoint class
+    DEFAULT_LIMITS = {
+        'candles': {'rate': 5, 'burst': 5},
+        'open_time': {'rate': 0.5, 'burst': 1},
+        'orders': {'rate': 2, 'burst': 2},
+        'results': {'rate': 2, 'burst': 4},
+        'balance': {'rate': 1, 'burst': 2},
+    }
+
+    def __init__(self, email, password, mode='PRACTICE', read_sessions=2, limits=None):
+        self.email = email
+        self.password = password
+        self.mode = mode
+        self.order_session = IQConnector(email, password, mode)
+        self.read_sessions = [IQConnector(email, password, mode) for _ in range(max(int(read_sessions), 0))]
+        self.read_locks = [threading.Lock() for _ in self.read_sessions]
+        self.order_lock = threading.Lock()
+        self._next = itertools.count()
+
+        cfg = {k: dict(v) for k, v in self.DEFAULT_LIMITS.items()}
+        for name, override in (limits or {}).items():
+            cfg.setdefault(name, {}).update(override)
+        self.endpoints = {name: Endpoint(name, **c) for name, c in cfg.items()}
+
+    @property
+    def Iq(self):
+        return self.order_session.Iq
+
+    @property
+    def asset_type_cache(self):
+        return self.order_session.asset_type_cache
+
+    def connect(self):
+        self.order_session.connect()
+        connected, locks = [], []
+        for session, lock in zip(self.read_sessions, self.read_locks):
+            try:
+                session.connect()
+                connected.append(session)
+                locks.append(lock)
+            except Exception as e:
+                print(f"⚠️ Read session failed to connect: {e}")
+        self.read_sessions, self.read_locks = connected, locks
+        return True
+
+    def _pick_read_session(self):
+        if not self.read_sessions:
+            return self.order_session, self.order_lock
+        n = len(self.read_sessions)
+        start = next(self._next) % n
+        # prefer an idle session, otherwise queue on the round-robin choice
+        for i in range(n):
+            idx = (start + i) % n
+            if self.read_locks[idx].acquire(blocking=False):
+                self.read_locks[idx].release()
+                return self.read_sessions[idx], self.read_locks[idx]
+        return self.read_sessions[start], self.read_locks[start]
+
+    def _read(self, endpoint, fn, *args, **kwargs):
+        session, lock = self._pick_read_session()
+        with lock:
+            try:
+                return self.endpoints[endpoint].call(fn, session, *args, **kwargs)
+            except CircuitOpenError:
+                raise
+            except Exception:
+                self._revive(session)
+                raise
+
+    def _order(self, endpoint, fn, *args, **kwargs):
+        with self.order_lock:
+            return self.endpoints[endpoint].call(fn, self.order_session, *args, **kwargs)
+
+    def _revive(self, session):
+        try:
+            if not session.Iq or not session.Iq.check_connect():
+                session.connect()
+        except Exception:
+            pass
+
+    def get_all_assets(self):
+        return self._read('open_time', IQConnector.get_all_assets)
+
+    def get_candles(self, asset, timeframe_seconds=60, count=100):
+        try:
+            return self._read('candles', IQConnector.fetch_candles, asset, timeframe_seconds, count)
+        except Exception:
+            return []
+
+    def get_payouts(self):
+        try:
+            return self._read('open_time', IQConnector.get_payouts)
+        except Exception:
+            return {}
+
+    def detect_asset_type(self, asset):
+        if asset in self.asset_type_cache:
+            return self.asset_type_cache[asset]
+        try:
+            result = self._read('open_time', IQConnector.detect_asset_type, asset)
+        except Exception:
+            result = None
+        self.asset_type_cache[asset] = result
+        return result
+
+    def get_balance(self):
+        return self._order('balance', IQConnector.get_balance)
+
+    def get_server_time(self):
+        return self.order_session.get_server_time()
+
+    # realtime streams are websocket subscriptions, not rate-limited requests;
+    # they live on the first read session
+    def _stream_session(self):
+        return self.read_sessions[0] if self.read_sessions else self.order_session
+
+    def start_stream(self, asset, size=1, maxdict=300):
+        self._stream_session().start_stream(asset, size, maxdict)
+
+    def stop_stream(self, asset, size=1):
+        self._stream_session().stop_stream(asset, size)
+
+    def get_realtime_candles(self, asset, size=1, since=0):
+        return self._stream_session().get_realtime_candles(asset, size, since)
+
+    def buy_asset(self, asset, amount, direction, expiration_minutes=1):
+        try:
+            return self._order('orders', IQConnector.buy_asset, asset, amount, direction,
+                               expiration_minutes, is_failure=lambda r: not r)
+        except CircuitOpenError as e:
+            print(f'Buy skipped (connector pool): {e}')
+            return None
+
+    def check_trade_result(self, response):
+        try:
+            return self._order('results', IQConnector.check_trade_result, response)
+        except CircuitOpenError:
+            return None
+
+    def get_position_open_time(self, response):
+        try:
+            return self._order('results', IQConnector.get_position_open_time, response)
+        except CircuitOpenError:
+            return None
+
+    def stats(self):
+        return {name: ep.stats() for name, ep in self.endpoints.items()}
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Control socket for a running bot (CONTROL_PORT).
+
+The bot listens on 127.0.0.1 for JSON lines such as {"cmd": "pause"} and
+answers each with one JSON line {"ok": true, "result": ...}. Requests are
+queued and executed by the main loop between scans, so they never race it.
+
+Usage:
+    python control.py stats
+    python control.py pause | resume | reload
+    python control.py add EURUSD-OTC GBPUSD-OTC
+    python control.py remove USDJPY-OTC
+    python control.py set min_score=4 BASE_AMOUNT=2
+"""
+import argparse
+import json
+import os
+import queue
+import socket
+import socketserver
+import threading
+import time
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                request = json.loads(line)
+                response = self.server.control.submit(request)
+            except ValueError as e:
+                response = {'ok': False, 'error': f'bad request: {e}'}
+            self.wfile.write((json.dumps(response, default=str) + '\n').encode())
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class ControlServer:
+    """Accepts control requests on a background thread; serve() runs them on the caller's."""
+
+    def __init__(self, port, host='127.0.0.1', timeout=30, poll=0.05):
+        self.timeout = timeout
+        self.poll = poll
+        self.requests = queue.Queue()
+        self.server = _Server((host, port), _Handler)
+        self.server.control = self
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    @property
+    def address(self):
+        return self.server.server_address
+
+    def submit(self, request):
+        reply = queue.Queue(maxsize=1)
+        self.requests.put((request, reply))
+        try:
+            return reply.get(timeout=self.timeout)
+        except queue.Empty:
+            return {'ok': False, 'error': 'bot did not answer in time'}
+
+    def serve(self, handler, seconds=0):
+        """
+        Run queued requests through handler(request) for up to `seconds` (0 = drain and
+        return). The deadline follows this module's `time`, so under a replay clock
+        the wait is in virtual seconds; the queue is polled in short real-time slices.
+        """
+        deadline = time.monotonic() + seconds
+        while True:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    request, reply = self.requests.get(timeout=min(remaining, self.poll))
+                else:
+                    request, reply = self.requests.get_nowait()
+            except queue.Empty:
+                if remaining > 0:
+                    continue
+                return
+            try:
+                reply.put({'ok': True, 'result': handler(request)})
+            except Exception as e:
+                reply.put({'ok': False, 'error': str(e)})
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def send(request, port, host='127.0.0.1', timeout=35):
+    with socket.create_connection((host, port), timeout=timeout) as sock:
+        sock.sendall((json.dumps(request) + '\n').encode())
+        with sock.makefile('r') as f:
+            return json.loads(f.readline())
+
+
+def _parse_value(text):
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Control a running trading bot')
+    parser.add_argument('cmd', choices=['stats', 'pause', 'resume', 'reload', 'add', 'remove', 'set'])
+    parser.add_argument('args', nargs='*', help='assets for add/remove, key=value pairs for set')
+    parser.add_argument('--port', type=int, default=int(os.getenv('CONTROL_PORT', 8765)))
+    args = parser.parse_args()
+
+    request = {'cmd': args.cmd}
+    if args.cmd in ('add', 'remove'):
+        request['assets'] = args.args
+    elif args.cmd == 'set':
+        request['values'] = {}
+        for pair in args.args:
+            key, _, value = pair.partition('=')
+            request['values'][key] = _parse_value(value)
+
+    response = send(request, args.port)
+    if response.get('ok'):
+        print(json.dumps(response.get('result'), indent=2, default=str))
+    else:
+        print(f"❌ {response.get('error')}")
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
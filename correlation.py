@@ -0,0 +1,190 @@
+# correlation.py - incremental cross-asset return correlation and correlated-signal filtering
+import numpy as np
+
+
+class CorrelationTracker:
+    """
+    Rolling correlation of per-bar log returns across all scanned assets.
+
+    Assets are scanned at different times, but every scan carries the recent
+    closed bars, so each asset's returns are collected per bar timestamp and a
+    bar becomes one matrix row once every tracked asset has reported it (or it
+    is `max_lag` bars behind the newest one; missing returns count as 0).
+    Each row updates running sums and the cross-product matrix with a rank-one
+    add and the row leaving the window with a rank-one subtract, so a new bar
+    costs O(N^2) vector work instead of recomputing the window. Sums are rebuilt
+    from the ring every `resync` rows to keep float drift out.
+
+    Returns that arrive for bars already committed without them (an asset
+    reporting for the first time, e.g. right after a restart, or one that fell
+    behind) are backfilled into those rows, a column update costing O(rows * N),
+    so every asset's candle window counts from its first scan.
+    """
+
+    def __init__(self, window=60, threshold=0.8, timeframe=60, max_lag=3, resync=1000):
+        self.window = int(window)
+        self.threshold = float(threshold)
+        self.timeframe = int(timeframe)
+        self.max_lag = int(max_lag)
+        self.resync = int(resync)
+
+        self.index = {}
+        self.capacity = 0
+        self.ring = np.zeros((self.window, 0))
+        self.filled = np.zeros((self.window, 0), dtype=bool)
+        self.ring_ts = np.full(self.window, np.nan)
+        self.sums = np.zeros(0)
+        self.cross = np.zeros((0, 0))
+        self.rows = 0
+        self.pos = 0
+        self.pushed = 0
+
+        self.pending = {}
+        self.last_ts = {}
+        self.committed_ts = float('-inf')
+
+    def _column(self, asset):
+        col = self.index.get(asset)
+        if col is None:
+            col = self.index[asset] = len(self.index)
+            if col >= self.capacity:
+                self._grow(max(2 * self.capacity, 16))
+        return col
+
+    def _grow(self, capacity):
+        extra = capacity - self.capacity
+        self.ring = np.pad(self.ring, ((0, 0), (0, extra)))
+        self.filled = np.pad(self.filled, ((0, 0), (0, extra)))
+        self.sums = np.pad(self.sums, (0, extra))
+        self.cross = np.pad(self.cross, ((0, extra), (0, extra)))
+        self.capacity = capacity
+
+    def update(self, asset, df):
+        """Feed the asset's latest candle window (the last, forming bar is ignored)."""
+        if df is None or len(df) < 3:
+            return
+        ts = df['ts'].to_numpy(dtype=float)[:-1]
+        close = df['close'].to_numpy(dtype=float)[:-1]
+        col = self._column(asset)
+        seen = self.last_ts.get(asset, float('-inf'))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns = np.log(close[1:] / close[:-1])
+        ts = ts[1:]
+        ok = np.isfinite(returns)
+        ts, returns = ts[ok], returns[ok]
+        late = ts <= self.committed_ts
+        if late.any():
+            self._backfill(col, ts[late], returns[late])
+        for t, r in zip(ts[~late], returns[~late]):
+            if t > seen:
+                self.pending.setdefault(t, {})[col] = r
+        self.last_ts[asset] = max(seen, ts[-1] if len(ts) else seen)
+        self._commit()
+
+    def _backfill(self, col, ts, returns):
+        """Fill `col` into committed rows that were pushed without it (ts sorted)."""
+        idx = np.minimum(np.searchsorted(ts, self.ring_ts), len(ts) - 1)
+        rows = np.flatnonzero((ts[idx] == self.ring_ts) & ~self.filled[:, col])
+        if not len(rows):
+            return
+        delta = returns[idx[rows]]
+        before = self.ring[rows]
+        before[:, col] = 0.0
+        change = delta @ before
+        self.cross[col] += change
+        self.cross[:, col] += change
+        self.cross[col, col] += delta @ delta
+        self.sums[col] += delta.sum()
+        self.ring[rows, col] = delta
+        self.filled[rows, col] = True
+
+    def drop(self, asset):
+        """Stop waiting for an asset that is no longer scanned."""
+        self.last_ts.pop(asset, None)
+        col = self.index.get(asset)
+        if col is not None:
+            for returns in self.pending.values():
+                returns.pop(col, None)
+        self._commit()
+
+    def _commit(self):
+        if not self.pending or not self.last_ts:
+            return
+        newest = max(self.pending)
+        oldest_reported = min(self.last_ts.values())
+        for t in sorted(self.pending):
+            if t > oldest_reported and t > newest - self.max_lag * self.timeframe:
+                break
+            self._push(t, self.pending.pop(t))
+            self.committed_ts = t
+
+    def _push(self, t, returns):
+        row = np.zeros(self.capacity)
+        row[list(returns)] = list(returns.values())
+        old = self.ring[self.pos]
+        self.sums += row - old
+        self.cross += np.outer(row, row) - np.outer(old, old)
+        self.ring[self.pos] = row
+        self.filled[self.pos] = False
+        self.filled[self.pos, list(returns)] = True
+        self.ring_ts[self.pos] = t
+        self.pos = (self.pos + 1) % self.window
+        self.rows = min(self.rows + 1, self.window)
+        self.pushed += 1
+        if self.pushed % self.resync == 0:
+            self.sums = self.ring.sum(axis=0)
+            self.cross = self.ring.T @ self.ring
+
+    def correlation(self, a, b):
+        i, j = self.index.get(a), self.index.get(b)
+        if i is None or j is None or self.rows < 2:
+            return 0.0
+        n = self.rows
+        mean_i, mean_j = self.sums[i] / n, self.sums[j] / n
+        cov = self.cross[i, j] / n - mean_i * mean_j
+        var_i = self.cross[i, i] / n - mean_i ** 2
+        var_j = self.cross[j, j] / n - mean_j ** 2
+        if var_i <= 1e-18 or var_j <= 1e-18:
+            return 0.0
+        return float(np.clip(cov / np.sqrt(var_i * var_j), -1.0, 1.0))
+
+    def matrix(self):
+        """(assets, full correlation matrix) for reporting."""
+        assets = list(self.index)
+        n, k = max(self.rows, 1), len(assets)
+        mean = self.sums[:k] / n
+        cov = self.cross[:k, :k] / n - np.outer(mean, mean)
+        std = np.sqrt(np.clip(np.diag(cov), 0, None))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = cov / np.outer(std, std)
+        return assets, np.nan_to_num(corr)
+
+    def redundant(self, asset, direction, other, other_direction):
+        """True if trading `asset` in `direction` repeats the bet on `other`."""
+        corr = self.correlation(asset, other)
+        return (corr if direction == other_direction else -corr) >= self.threshold
+
+    def select(self, candidates, open_positions=()):
+        """
+        Keep the strongest signal per correlated cluster.
+        candidates: (asset, direction, analysis, ...) tuples; open_positions:
+        (asset, direction) pairs already traded. Returns (kept, suppressed) with
+        suppressed entries (candidate, asset it duplicates).
+        """
+        def strength(c):
+            analysis = c[2] or {}
+            return max(analysis.get('bullish_score', 0), analysis.get('bearish_score', 0))
+
+        taken = list(open_positions)
+        kept, suppressed = [], []
+        for cand in sorted(candidates, key=strength, reverse=True):
+            twin = next((a for a, d in taken if a != cand[0] and self.redundant(cand[0], cand[1], a, d)), None)
+            if twin is None:
+                kept.append(cand)
+                taken.append((cand[0], cand[1]))
+            else:
+                suppressed.append((cand, twin))
+        return kept, suppressed
+
+    def memory_bytes(self):
+        return self.ring.nbytes + self.filled.nbytes + self.sums.nbytes + self.cross.nbytes
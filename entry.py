@@ -0,0 +1,127 @@
+# entry.py - latency-compensated order entry relative to the candle boundary
+import math
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+
+class EntryScheduler:
+    """
+    Times order placement so orders reach the broker `target_offset` seconds after
+    a candle boundary (broker clock).
+
+    Clock offset: the connector's server timestamp is pushed by the broker and is
+    at least one-way latency plus push interval old when read, so
+    server_time - local_time underestimates the offset; the largest recent sample
+    plus half the order RTT is used as the estimate.
+    RTT: measured on every order (request sent -> response received), smoothed
+    with an EWMA; `default_rtt` is only used until the first order.
+    Orders are released at local time target - offset - RTT/2.
+    Entry skew: once a trade has a result, record_open() takes the position's
+    open time from the broker, and open time - target is the achieved skew.
+    The send-time estimate (local send + offset + RTT/2 - target) is kept
+    separately as est_skew: it is built from the same offset and RTT that set
+    the send time, so it can't show an error in the clock offset itself.
+    """
+
+    def __init__(self, timeframe=60, target_offset=0.5, default_rtt=0.3, alpha=0.2,
+                 max_wait=None, window=120):
+        self.timeframe = int(timeframe)
+        self.target_offset = float(target_offset)
+        self.rtt = float(default_rtt)
+        self.alpha = float(alpha)
+        self.max_wait = self.timeframe if max_wait is None else float(max_wait)
+        self.offsets = deque(maxlen=window)
+        self.skews = deque(maxlen=1000)
+        self.estimated = deque(maxlen=1000)
+        self.rtts = deque(maxlen=1000)
+        self.lock = threading.Lock()
+
+    def sync(self, conn):
+        """Take one clock-offset sample from the connector's broker time, if it has one."""
+        try:
+            server = conn.get_server_time()
+        except Exception:
+            return
+        if server:
+            with self.lock:
+                self.offsets.append(float(server) - time.time())
+
+    @property
+    def offset(self):
+        with self.lock:
+            if not self.offsets:
+                return 0.0
+            return max(self.offsets) + self.rtt / 2
+
+    def server_time(self, now=None):
+        return (time.time() if now is None else now) + self.offset
+
+    def next_target(self, now=None):
+        """Next broker-clock entry time (boundary + target_offset) still reachable."""
+        server_now = self.server_time(now)
+        one_way = self.rtt / 2
+        target = math.floor(server_now / self.timeframe) * self.timeframe + self.target_offset
+        while target - one_way <= server_now:
+            target += self.timeframe
+        return target
+
+    def place(self, send_fn):
+        """
+        Wait for the entry moment, call send_fn() and record RTT and estimated skew.
+        Returns (response, target); target is None if the order was sent untimed.
+        """
+        offset = self.offset
+        target = self.next_target()
+        send_at = target - offset - self.rtt / 2
+        if send_at - time.time() > self.max_wait:
+            # boundary too far away for this signal: send now, untimed
+            target = None
+        else:
+            wait = send_at - time.time()
+            if wait > 0.02:
+                time.sleep(wait - 0.01)
+            while time.time() < send_at:
+                pass
+
+        sent = time.time()
+        response = send_fn()
+        rtt = time.time() - sent
+
+        with self.lock:
+            # the first measured order replaces the default_rtt guess
+            self.rtt = rtt if not self.rtts else self.rtt + self.alpha * (rtt - self.rtt)
+            self.rtts.append(rtt)
+            if target is not None:
+                self.estimated.append(sent + rtt / 2 + offset - target)
+        return response, target
+
+    def record_open(self, target, open_time):
+        """Achieved skew of a timed order from the broker's position open time."""
+        if target is None or not open_time:
+            return
+        with self.lock:
+            self.skews.append(float(open_time) - target)
+
+    def stats(self):
+        with self.lock:
+            skews = np.array(self.skews, dtype=float)
+            estimated = np.array(self.estimated, dtype=float)
+            rtts = np.array(self.rtts, dtype=float)
+            stats = {
+                'orders': len(rtts),
+                'timed': len(estimated),
+                'confirmed': len(skews),
+                'offset': max(self.offsets) + self.rtt / 2 if self.offsets else 0.0,
+                'rtt': self.rtt,
+            }
+        if len(rtts):
+            stats['rtt_p50'], stats['rtt_p99'] = np.percentile(rtts, [50, 99]).tolist()
+        for prefix, values in (('skew', skews), ('est_skew', estimated)):
+            if len(values):
+                p50, p90, p99 = np.percentile(values, [50, 90, 99]).tolist()
+                stats.update({f'{prefix}_p50': p50, f'{prefix}_p90': p90, f'{prefix}_p99': p99,
+                              f'{prefix}_max_abs': float(np.abs(values).max())})
+        return stats
@@ -0,0 +1,169 @@
+# ledger.py - thread-safe position ledger with per-asset/per-slot martingale chains
+import itertools
+import sys
+import threading
+import time
+
+
+class Position:
+    __slots__ = ('id', 'asset', 'direction', 'amount', 'step', 'chain', 'opened_at')
+
+    def __init__(self, id, asset, direction, amount, step, chain, opened_at):
+        self.id = id
+        self.asset = asset
+        self.direction = direction
+        self.amount = amount
+        self.step = step
+        self.chain = chain
+        self.opened_at = opened_at
+
+
+class PositionLedger:
+    """
+    Tracks open positions and martingale chains for concurrent trades.
+    chain_mode='asset': every asset has its own martingale chain (one open position per asset).
+    chain_mode='slot':  max_concurrent independent chains, any asset may use a free slot.
+    All updates happen under one lock, so trade threads never race on stake or P/L.
+    """
+
+    def __init__(self, base_amount=1, martingale_multiplier=2.2, max_concurrent=3,
+                 max_exposure=0, chain_mode='asset'):
+        if chain_mode not in ('asset', 'slot'):
+            raise ValueError(f"chain_mode must be 'asset' or 'slot', got {chain_mode!r}")
+        self.base_amount = float(base_amount)
+        self.martingale_multiplier = float(martingale_multiplier)
+        self.max_concurrent = max(int(max_concurrent), 1)
+        self.max_exposure = float(max_exposure or 0)
+        self.chain_mode = chain_mode
+
+        self.lock = threading.RLock()
+        self.positions = {}
+        self.chains = {}
+        self.total_profit = 0.0
+        self.trade_count = 0
+        self._ids = itertools.count(1)
+
+    def _chain(self, key):
+        return self.chains.setdefault(key, {'amount': self.base_amount, 'losses': 0})
+
+    def _busy_chains(self):
+        return {p.chain for p in self.positions.values()}
+
+    def _free_chain(self, asset):
+        busy = self._busy_chains()
+        if self.chain_mode == 'asset':
+            return None if asset in busy else asset
+        for slot in range(self.max_concurrent):
+            key = f"slot{slot}"
+            if key not in busy:
+                return key
+        return None
+
+    def configure(self, base_amount=None, martingale_multiplier=None, max_concurrent=None,
+                  max_exposure=None):
+        """
+        Change limits at runtime. Chains sitting at the old base amount (no
+        losses) move to the new one; chains mid-martingale keep their stake.
+        """
+        with self.lock:
+            if base_amount is not None:
+                for chain in self.chains.values():
+                    if chain['losses'] == 0:
+                        chain['amount'] = float(base_amount)
+                self.base_amount = float(base_amount)
+            if martingale_multiplier is not None:
+                self.martingale_multiplier = float(martingale_multiplier)
+            if max_concurrent is not None:
+                self.max_concurrent = max(int(max_concurrent), 1)
+            if max_exposure is not None:
+                self.max_exposure = float(max_exposure or 0)
+
+    def exposure(self):
+        with self.lock:
+            return sum(p.amount for p in self.positions.values())
+
+    def check_open(self, asset):
+        """(ok, reason) for opening a position on `asset` right now."""
+        with self.lock:
+            if len(self.positions) >= self.max_concurrent:
+                return False, f"max concurrent positions ({self.max_concurrent}) open"
+            if any(p.asset == asset for p in self.positions.values()):
+                return False, f"position already open on {asset}"
+            chain = self._free_chain(asset)
+            if chain is None:
+                return False, "no free martingale slot"
+            amount = self._chain(chain)['amount']
+            if self.max_exposure and self.exposure() + amount > self.max_exposure:
+                return False, f"max exposure (${self.max_exposure:.2f}) would be exceeded"
+            return True, None
+
+    def open_position(self, asset, direction):
+        """Reserve the next stake for `asset`; returns a Position or None if limits forbid it."""
+        with self.lock:
+            ok, _ = self.check_open(asset)
+            if not ok:
+                return None
+            key = self._free_chain(asset)
+            chain = self._chain(key)
+            pos = Position(next(self._ids), asset, direction, chain['amount'],
+                           chain['losses'], key, time.time())
+            self.positions[pos.id] = pos
+            return pos
+
+    def cancel_position(self, position_id):
+        """Release a reservation whose order was never placed."""
+        with self.lock:
+            return self.positions.pop(position_id, None)
+
+    def close_position(self, position_id, result):
+        """
+        Settle a position ('win', 'loss' or anything else = unknown, treated as loss).
+        Returns (profit, chain_state) with chain_state = {'amount', 'losses'} after the update.
+        """
+        with self.lock:
+            pos = self.positions.pop(position_id)
+            chain = self._chain(pos.chain)
+            if result == 'win':
+                profit = pos.amount * 0.80
+                chain['losses'] = 0
+                chain['amount'] = self.base_amount
+            else:
+                profit = -pos.amount
+                chain['losses'] += 1
+                chain['amount'] = round(pos.amount * self.martingale_multiplier, 2)
+            self.total_profit += profit
+            self.trade_count += 1
+            return profit, dict(chain)
+
+    def max_consecutive_losses(self):
+        with self.lock:
+            return max((c['losses'] for c in self.chains.values()), default=0)
+
+    def max_amount(self):
+        with self.lock:
+            return max((c['amount'] for c in self.chains.values()), default=self.base_amount)
+
+    def memory_bytes(self):
+        with self.lock:
+            per_position = sys.getsizeof(Position(0, '', '', 0.0, 0, '', 0.0)) + 6 * 28
+            return len(self.positions) * per_position + sum(sys.getsizeof(c) for c in self.chains.values())
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'total_profit': self.total_profit,
+                'trade_count': self.trade_count,
+                'chains': {k: dict(v) for k, v in self.chains.items()},
+                'open_positions': [
+                    {'asset': p.asset, 'direction': p.direction, 'amount': p.amount, 'step': p.step}
+                    for p in self.positions.values()
+                ],
+                'exposure': sum(p.amount for p in self.positions.values()),
+            }
+
+    def restore(self, total_profit=0.0, trade_count=0, chains=None):
+        with self.lock:
+            self.total_profit = float(total_profit)
+            self.trade_count = int(trade_count)
+            self.chains = {k: {'amount': float(v['amount']), 'losses': int(v['losses'])}
+                           for k, v in (chains or {}).items()}
@@ -14,7 +14,9 @@ if BASE_DIR not in sys.path:
     sys.path.insert(0, BASE_DIR)
 
 # carga dotenv desde BASE_DIR si existe
-from dotenv import load_dotenv
+from dotenv import load_dotenv, dotenv_values
+# entorno del proceso antes de .env: 'reload' lo vuelve a combinar con el .env actual
+PROCESS_ENV = dict(os.environ)
 load_dotenv(os.path.join(BASE_DIR, '.env'))
 
 # Intentamos importar connector de la forma habitual; si falla, lo cargamos manualmente
@@ -32,11 +34,24 @@ except ModuleNotFoundError:
         raise
 
 # y ahora importamos la clase concreta
-from connector import IQConnector
+from connector import IQConnector, ConnectorPool
 from strategy import AdvancedStrategy
 from manager import TradeManager
+from scheduler import AssetScheduler
+from replay import RecordingConnector, ReplayConnector
+from offload import AnalysisOffload
+from ticks import TickFeed
+from shadow import ShadowEvaluator
+from sweep import load_candles
+from entry import EntryScheduler
+from account import AccountMirror
+from control import ControlServer
+from memory import MemoryMonitor, parse_budgets
+from correlation import CorrelationTracker
+import json
 import pandas as pd
 import threading
+import multiprocessing
 
 load_dotenv()
 
@@ -50,8 +65,56 @@ START_BALANCE = float(os.getenv('START_BALANCE', 24.65))
 MAX_LOSSES = int(os.getenv('MAX_LOSSES', 5))
 TIMEFRAME = os.getenv('TIMEFRAME', '1m')
 ASSETS_ENV = os.getenv('ASSETS', '')
+POOL_READ_SESSIONS = int(os.getenv('POOL_READ_SESSIONS', 0))
+SCAN_MAX_INTERVAL = float(os.getenv('SCAN_MAX_INTERVAL', 60))
+RECORD_FILE = os.getenv('RECORD_FILE', '')
+REPLAY_FILE = os.getenv('REPLAY_FILE', '')
+REPLAY_SPEED = float(os.getenv('REPLAY_SPEED', 1))
+MAX_CONCURRENT = int(os.getenv('MAX_CONCURRENT', 3))
+MAX_EXPOSURE = float(os.getenv('MAX_EXPOSURE', 0))
+CHAIN_MODE = os.getenv('CHAIN_MODE', 'asset')
+ANALYSIS_WORKERS = int(os.getenv('ANALYSIS_WORKERS', 0))
+TICK_STREAM = os.getenv('TICK_STREAM', '0') == '1'
+SHADOW_VARIANTS = os.getenv('SHADOW_VARIANTS', '')
+PATTERN_SEED_DIR = os.getenv('PATTERN_SEED_DIR', '')
+ENTRY_OFFSET = os.getenv('ENTRY_OFFSET', '')
+ACCOUNT_RECONCILE = float(os.getenv('ACCOUNT_RECONCILE', 60))
+CONTROL_PORT = int(os.getenv('CONTROL_PORT', 0))
+STRATEGY_PARAMS = os.getenv('STRATEGY_PARAMS', '')
+MEMORY_BUDGETS = os.getenv('MEMORY_BUDGETS', '')
+MEMORY_REPORT = float(os.getenv('MEMORY_REPORT', 0))
+CORRELATION_THRESHOLD = float(os.getenv('CORRELATION_THRESHOLD', 0))
+CORRELATION_WINDOW = int(os.getenv('CORRELATION_WINDOW', 60))
 
-TIMEFRAME_SEC = 60 if TIMEFRAME == '1m' else int(TIMEFRAME)
+# settings the control socket can change at runtime -> TradeManager.configure() argument
+MANAGER_SETTINGS = {
+    'BASE_AMOUNT': 'base_amount',
+    'MARTINGALE_MULTIPLIER': 'martingale_multiplier',
+    'TAKE_PROFIT': 'take_profit',
+    'MAX_LOSSES': 'max_losses',
+    'MAX_CONCURRENT': 'max_concurrent',
+    'MAX_EXPOSURE': 'max_exposure',
+}
+# their built-in defaults (as in the os.getenv calls above)
+MANAGER_DEFAULTS = {
+    'BASE_AMOUNT': 1,
+    'MARTINGALE_MULTIPLIER': 2.2,
+    'TAKE_PROFIT': 50,
+    'MAX_LOSSES': 5,
+    'MAX_CONCURRENT': 3,
+    'MAX_EXPOSURE': 0,
+}
+
+def parse_timeframe(tf):
+    # '5s', '15s', '1m', '5m' or plain seconds
+    tf = str(tf).strip().lower()
+    if tf.endswith('s'):
+        return int(tf[:-1])
+    if tf.endswith('m'):
+        return int(tf[:-1]) * 60
+    return int(tf)
+
+TIMEFRAME_SEC = parse_timeframe(TIMEFRAME)
 CANDLES_COUNT = 120
 
 running = True
@@ -66,17 +129,61 @@ signal.signal(signal.SIGINT, signal_handler)
 def df_from_candles(candles):
     if not candles:
         return pd.DataFrame()
-    df = pd.DataFrame(candles)
-    for col in ['ts', 'open', 'high', 'low', 'close', 'volume']:
-        if col not in df.columns:
-            df[col] = None
-    return df[['ts', 'open', 'high', 'low', 'close', 'volume']]
+    # one pass over the candle dicts straight into the six columns (missing -> NaN)
+    return pd.DataFrame.from_records(candles, columns=['ts', 'open', 'high', 'low', 'close', 'volume'])
+
+def seed_patterns(strategy, directory, assets):
+    # <ASSET>.csv / <ASSET>.json candle files (sweep.py format) in the bot's timeframe
+    total = 0
+    for name in sorted(os.listdir(directory)):
+        asset, ext = os.path.splitext(name)
+        if ext.lower() not in ('.csv', '.json') or asset not in assets:
+            continue
+        try:
+            closes = load_candles(os.path.join(directory, name))['close'].to_numpy(dtype=float)
+            total += strategy.seed_patterns(asset, closes)
+        except Exception as e:
+            print(f"⚠️ Could not seed patterns from {name}: {e}")
+    return total
+
+def load_strategy_params(path):
+    if not path:
+        return {}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def fresh_settings():
+    # what a fresh start would configure: process environment over the current .env over
+    # the built-in defaults, and STRATEGY_PARAMS over AdvancedStrategy.DEFAULT_PARAMS
+    env = dict(dotenv_values(os.path.join(BASE_DIR, '.env')), **PROCESS_ENV)
+    values = {k: float(env.get(k) or MANAGER_DEFAULTS[k]) for k in MANAGER_SETTINGS}
+    values.update(AdvancedStrategy.DEFAULT_PARAMS)
+    values.update(load_strategy_params(env.get('STRATEGY_PARAMS', '')))
+    return values
+
+def make_connector(email, password, mode):
+    # REPLAY_FILE serves recorded broker traffic instead of the live API
+    if REPLAY_FILE:
+        return ReplayConnector(REPLAY_FILE, speed=REPLAY_SPEED)
+    # POOL_READ_SESSIONS > 0 spreads read traffic over extra sessions with rate limiting
+    if POOL_READ_SESSIONS > 0:
+        conn = ConnectorPool(email, password, mode, read_sessions=POOL_READ_SESSIONS)
+    else:
+        conn = IQConnector(email, password, mode)
+    if RECORD_FILE:
+        conn = RecordingConnector(conn, RECORD_FILE)
+    return conn
+
+def pause(seconds):
+    # the connector pool paces requests with its own rate limiters
+    if POOL_READ_SESSIONS <= 0:
+        time.sleep(seconds)
 
 def reconnect(email, password, mode, max_retries=3):
     for attempt in range(max_retries):
         try:
             print(f"🔄 Reconnection attempt {attempt + 1}/{max_retries}...")
-            conn = IQConnector(email, password, mode)
+            conn = make_connector(email, password, mode)
             conn.connect()
             print(f"✅ Reconnected successfully")
             return conn
@@ -89,7 +196,7 @@ def reconnect(email, password, mode, max_retries=3):
 def main():
     global running
     
-    if not EMAIL or not PASSWORD:
+    if not REPLAY_FILE and (not EMAIL or not PASSWORD):
         print('❌ ERROR: Please configure IQ_EMAIL and IQ_PASSWORD in Replit Secrets')
         return
     
@@ -103,9 +210,26 @@ def main():
     print(f"   Take Profit Target: ${TAKE_PROFIT}")
     print(f"   Max Consecutive Losses: {MAX_LOSSES}")
     print(f"   Timeframe: {TIMEFRAME}")
+    print(f"   Max Concurrent Positions: {MAX_CONCURRENT} (martingale per {CHAIN_MODE})")
+    if MAX_EXPOSURE:
+        print(f"   Max Exposure: ${MAX_EXPOSURE}")
+    if ENTRY_OFFSET:
+        print(f"   Timed Entry: {float(ENTRY_OFFSET):g}s after each {TIMEFRAME} candle boundary")
+    if ANALYSIS_WORKERS > 0:
+        print(f"   Analysis Workers: {ANALYSIS_WORKERS} processes (shared-memory candles)")
+    if POOL_READ_SESSIONS > 0:
+        print(f"   Connector Pool: 1 order + {POOL_READ_SESSIONS} read sessions")
+    if REPLAY_FILE:
+        print(f"   Replaying: {REPLAY_FILE} at {REPLAY_SPEED:g}x")
+    elif RECORD_FILE:
+        print(f"   Recording broker traffic to: {RECORD_FILE}")
     print("=" * 70)
     
-    conn = IQConnector(EMAIL, PASSWORD, TRADE_MODE)
+    conn = make_connector(EMAIL, PASSWORD, TRADE_MODE)
+    if REPLAY_FILE:
+        # run the bot on the replay's virtual (accelerated) clock
+        conn.clock.install(sys.modules[__name__], sys.modules['manager'], sys.modules['scheduler'],
+                           sys.modules['entry'], sys.modules['account'], sys.modules['control'])
     print('\n🔌 Connecting to IQ Option...')
     
     try:
@@ -115,12 +239,12 @@ def main():
         print(f'❌ Failed to connect: {e}')
         return
     
-    try:
-        balance = conn.Iq.get_balance()
-        print(f'💰 Current Balance: ${balance:.2f}')
-    except:
-        balance = START_BALANCE
-        print(f'💰 Starting Balance: ${balance:.2f}')
+    # the mirror answers balance reads from memory; the broker is only asked to reconcile
+    account = AccountMirror(conn, START_BALANCE, ACCOUNT_RECONCILE)
+    if account.reconcile():
+        print(f'💰 Current Balance: ${account.balance:.2f}')
+    else:
+        print(f'💰 Starting Balance: ${account.balance:.2f}')
     
     otc_assets = conn.get_all_assets()
     
@@ -135,36 +259,245 @@ def main():
     if len(otc_assets) > 10:
         print(f'   ... and {len(otc_assets) - 10} more')
     
-    strategy = AdvancedStrategy()
+    # ENTRY_OFFSET times orders against the broker's candle boundary, compensating RTT
+    entry = EntryScheduler(TIMEFRAME_SEC, float(ENTRY_OFFSET)) if ENTRY_OFFSET else None
+    if entry:
+        entry.sync(conn)
+
+    strategy = AdvancedStrategy(load_strategy_params(STRATEGY_PARAMS))
+    if PATTERN_SEED_DIR:
+        started = time.time()
+        seeded = seed_patterns(strategy, PATTERN_SEED_DIR, set(otc_assets))
+        print(f'📚 Seeded {seeded} historical patterns in {time.time() - started:.1f}s')
     manager = TradeManager(
         conn,
         base_amount=BASE_AMOUNT,
         martingale_multiplier=MARTINGALE_MULTIPLIER,
         take_profit=TAKE_PROFIT,
         start_balance=START_BALANCE,
-        max_losses=MAX_LOSSES
+        max_losses=MAX_LOSSES,
+        max_concurrent=MAX_CONCURRENT,
+        max_exposure=MAX_EXPOSURE,
+        chain_mode=CHAIN_MODE,
+        entry=entry,
+        account=account
     )
 
+    scan_interval = 5
+    scheduler = AssetScheduler(otc_assets, strategy.params,
+                               min_interval=scan_interval, max_interval=SCAN_MAX_INTERVAL)
+    scheduler.set_payouts(conn.get_payouts())
+
+    # ANALYSIS_WORKERS > 0 runs analyze() in worker processes over shared-memory candles
+    offload = None
+    if ANALYSIS_WORKERS > 0:
+        offload = AnalysisOffload(strategy, ANALYSIS_WORKERS, max_assets=len(otc_assets) + 64,
+                                  capacity=max(256, 2 * CANDLES_COUNT))
+    frames = {}
+
+    # TICK_STREAM=1 builds TIMEFRAME bars locally from the realtime stream
+    ticks = None
+    if TICK_STREAM:
+        if REPLAY_FILE and not conn.has_stream:
+            print('⚠️ TICK_STREAM: the recording has no realtime stream, falling back to get_candles')
+        else:
+            # stream buffer covers the longest scan gap; longer gaps are re-seeded
+            ticks = TickFeed(conn, TIMEFRAME_SEC, buffer=max(300, int(2 * SCAN_MAX_INTERVAL)),
+                             min_bars=CANDLES_COUNT)
+            print(f'📶 Building {TIMEFRAME} candles locally from the realtime stream')
+
+    # SHADOW_VARIANTS paper-trades extra strategy configurations on the same candles
+    shadow = None
+    if SHADOW_VARIANTS:
+        try:
+            shadow = ShadowEvaluator.from_file(SHADOW_VARIANTS, strategy.pattern_matcher, TIMEFRAME_SEC,
+                                               BASE_AMOUNT, MARTINGALE_MULTIPLIER, MAX_CONCURRENT,
+                                               indicators=strategy.indicators,
+                                               max_losses=MAX_LOSSES, take_profit=TAKE_PROFIT)
+            print(f'🧪 Shadow mode: {len(shadow.variants)} variants from {SHADOW_VARIANTS}')
+            if 60 % TIMEFRAME_SEC:
+                print(f'   ⚠️ 1-minute expiries inside a {TIMEFRAME} bar cannot be settled and count as void')
+        except (OSError, ValueError) as e:
+            print(f'⚠️ Could not load shadow variants: {e}')
+
     # --- función auxiliar para ejecutar trades en un hilo separado ---
-    def execute_signal(asset, direction, balance, analysis):
+    def execute_signal(asset, direction, balance, analysis, pattern_closes):
         try:
             result = manager.execute_trade(asset, direction, balance, analysis)
-            if result:
-                pattern_closes = df['close'].tail(20).tolist()
+            # remember the direction the market actually took after this pattern
+            if result == 'win':
                 strategy.update_pattern_result(asset, pattern_closes, direction)
+            elif result == 'loss':
+                strategy.update_pattern_result(asset, pattern_closes, 'put' if direction == 'call' else 'call')
         except Exception as e:
             print(f"⚠️ Error ejecutando operación en {asset}: {e}")
 
+    def dispatch_signal(asset, signal, analysis, pattern_closes):
+        """Start a trade thread for a call/put signal. Returns True if trading must stop."""
+        if signal not in ('call', 'put'):
+            return False
+        print(f'\n🎯 SIGNAL DETECTED: {signal.upper()} on {asset}')
+        if control_state['paused']:
+            print('   ⏸️ Skipped: trading paused')
+            return False
+
+        can_open, reason = manager.can_open(asset)
+        if not can_open:
+            print(f'   ⏸️ Skipped: {reason}')
+            return False
+
+        balance = account.balance
+
+        # --- lanzar operación en un hilo separado ---
+        t = threading.Thread(
+            target=execute_signal,
+            args=(asset, signal, balance, analysis, pattern_closes),
+            daemon=True
+        )
+        t.start()
+
+        # seguir escaneando otros pares sin esperar a que termine
+        pause(1)
+
+        should_stop, reason = manager.should_stop_trading()
+        if should_stop:
+            print(f'\n🛑 STOPPING: {reason}')
+            return True
+        
+        pause(2)
+        return False
+
+    # CORRELATION_THRESHOLD > 0: per cycle, only the strongest signal of each correlated cluster trades
+    correlation = None
+    if CORRELATION_THRESHOLD > 0:
+        correlation = CorrelationTracker(CORRELATION_WINDOW, CORRELATION_THRESHOLD, TIMEFRAME_SEC)
+        print(f'🔗 Suppressing signals correlated above {CORRELATION_THRESHOLD:g} '
+              f'({CORRELATION_WINDOW}-bar returns)')
+
+    def dispatch_correlated(candidates):
+        """Dispatch the strongest signal of each correlated cluster. Returns True if trading must stop."""
+        open_positions = [(p['asset'], p['direction']) for p in manager.ledger.snapshot()['open_positions']]
+        kept, suppressed = correlation.select(candidates, open_positions)
+        for (asset, signal, _, _), twin in suppressed:
+            print(f'\n🔗 {signal.upper()} on {asset} suppressed: correlated with {twin} '
+                  f'({correlation.correlation(asset, twin):+.2f})')
+        for asset, signal, analysis, pattern_closes in kept:
+            if dispatch_signal(asset, signal, analysis, pattern_closes):
+                return True
+        return False
+
+    # --- memory accounting: bytes per subsystem, MEMORY_BUDGETS trims the caches ---
+    memory = MemoryMonitor(parse_budgets(MEMORY_BUDGETS))
+    memory.register('candles', strategy.indicators)
+    if ticks:
+        memory.register('candles', ticks)
+    if offload:
+        # fixed-size shared memory allocated up front: reported on its own, never trimmed
+        memory.register('shared_candles', offload.store)
+    memory.register('analysis_cache', strategy.cache)
+    memory.register('patterns', strategy.pattern_matcher)
+    memory.register('pending_trades', manager.ledger)
+    if shadow:
+        memory.register('pending_trades', shadow)
+    if correlation:
+        memory.register('correlation', correlation)
+
+    # --- control socket: runtime config, asset list, pause/resume, stats ---
+    control_state = {'paused': False}
+    control = None
+    if CONTROL_PORT:
+        try:
+            control = ControlServer(CONTROL_PORT)
+            print(f'🎛️ Control socket listening on 127.0.0.1:{CONTROL_PORT}')
+        except OSError as e:
+            print(f'⚠️ Could not open control socket: {e}')
+
+    def apply_settings(values):
+        params = {k: v for k, v in values.items() if k in strategy.params}
+        settings = {MANAGER_SETTINGS[k]: v for k, v in values.items() if k in MANAGER_SETTINGS}
+        unknown = set(values) - set(params) - set(MANAGER_SETTINGS)
+        if unknown:
+            raise ValueError(f"Unknown settings: {', '.join(sorted(unknown))}")
+        # validate everything first: either all values apply or none do
+        params = strategy.validate_params(params)
+        settings = manager.validate_settings(settings)
+        if params:
+            strategy.set_params(params)
+        if settings:
+            manager.configure(**settings)
+        print(f'🎛️ Settings updated: {dict(params, **settings)}')
+        return {'strategy': params, 'manager': settings}
+
+    def handle_command(request):
+        cmd = request.get('cmd')
+        if cmd == 'stats':
+            result = {
+                'paused': control_state['paused'],
+                'trading': manager.get_stats(),
+                'account': account.snapshot(),
+                'scheduler': scheduler.stats(),
+                'analysis_cache': strategy.cache.stats(),
+                'indicators': strategy.indicators.stats(),
+                'params': strategy.params,
+                'assets': scheduler.assets,
+            }
+            if entry:
+                result['entry'] = entry.stats()
+            if shadow:
+                result['shadow'] = shadow.report()
+            result['memory'] = memory.report()
+            return result
+        if cmd in ('pause', 'resume'):
+            control_state['paused'] = cmd == 'pause'
+            print(f"🎛️ Trading {'paused' if control_state['paused'] else 'resumed'}")
+            return {'paused': control_state['paused']}
+        if cmd == 'add':
+            added = [a for a in dict.fromkeys(request.get('assets', [])) if a not in scheduler.assets]
+            if offload and len(added) > offload.store.available():
+                raise ValueError(f"Analysis store has room for {offload.store.available()} more assets "
+                                 f"(ANALYSIS_WORKERS store size {offload.store.max_assets}); remove some first")
+            scheduler.set_assets(scheduler.assets + added)
+            return {'assets': len(scheduler.assets)}
+        if cmd == 'remove':
+            removed = set(request.get('assets', []))
+            scheduler.set_assets([a for a in scheduler.assets if a not in removed])
+            for asset in removed:
+                strategy.cache.invalidate(asset)
+                strategy.indicators.drop(asset)
+                if ticks:
+                    ticks.drop(asset)
+                if offload:
+                    offload.release(asset)
+                    frames.pop(asset, None)
+                if correlation:
+                    correlation.drop(asset)
+            return {'assets': len(scheduler.assets)}
+        if cmd == 'set':
+            return apply_settings(request.get('values', {}))
+        if cmd == 'reload':
+            # re-read .env and STRATEGY_PARAMS from scratch, so settings removed from them
+            # go back to their defaults; caches, connection and pattern history stay
+            return apply_settings(fresh_settings())
+        raise ValueError(f"Unknown command: {cmd}")
+
     print('\n🚀 Starting main trading loop...\n')
     print('🔍 The bot will now scan for patterns and execute trades automatically')
     print('   Press Ctrl+C to stop\n')
     
     last_reconnect = time.time()
-    scan_interval = 5
+    last_payouts = time.time()
+    last_memory = last_memory_report = time.time()
     
     while running:
         loop_start = time.time()
         
+        if control:
+            control.serve(handle_command)
+        
+        if REPLAY_FILE and conn.finished():
+            print('\n📼 End of recorded traffic reached')
+            break
+        
         should_stop, reason = manager.should_stop_trading()
         if should_stop:
             print(f'\n🛑 STOPPING: {reason}')
@@ -179,63 +512,113 @@ def main():
             try:
                 if not conn.Iq or not hasattr(conn.Iq, 'check_connect') or not conn.Iq.check_connect():
                     print('\n⚠️ Connection lost, attempting to reconnect...')
+                    if isinstance(conn, RecordingConnector):
+                        conn.close()
                     conn = reconnect(EMAIL, PASSWORD, TRADE_MODE)
                     if not conn:
                         print('❌ Could not reconnect, stopping bot')
                         break
+                    manager.conn = conn
+                    account.conn = conn
+                    if ticks:
+                        ticks.reattach(conn)
                     last_reconnect = time.time()
             except:
                 pass
+
+        if entry:
+            entry.sync(conn)
+        
+        if account.due():
+            account.reconcile()
+        
+        if time.time() - last_memory > 60:
+            freed = memory.enforce()
+            if freed:
+                print(f"🧠 Over memory budget, evicted: {freed}")
+            last_memory = time.time()
+        
+        if MEMORY_REPORT and time.time() - last_memory_report > MEMORY_REPORT:
+            memory.print_report()
+            last_memory_report = time.time()
         
-        for asset in otc_assets:
+        if time.time() - last_payouts > 300:
+            scheduler.set_payouts(conn.get_payouts())
+            last_payouts = time.time()
+        
+        candidates = []
+        for asset in scheduler.due():
             if not running:
                 break
             
             try:
-                candles = conn.get_candles(asset, timeframe_seconds=TIMEFRAME_SEC, count=CANDLES_COUNT)
+                if ticks:
+                    candles = ticks.get_candles(asset, CANDLES_COUNT)
+                else:
+                    candles = conn.get_candles(asset, timeframe_seconds=TIMEFRAME_SEC, count=CANDLES_COUNT)
                 df = df_from_candles(candles)
                 
                 if df.empty or len(df) < 30:
-                    time.sleep(0.3)
+                    scheduler.update(asset)
+                    pause(0.3)
                     continue
                 
-                signal, analysis = strategy.analyze(df, asset=asset)
+                if shadow:
+                    shadow.on_candles(asset, df, time.time())
+                if correlation:
+                    correlation.update(asset, df)
                 
-                if signal in ('call', 'put'):
-                    print(f'\n🎯 SIGNAL DETECTED: {signal.upper()} on {asset}')
-
-                    try:
-                        balance = conn.Iq.get_balance()
-                    except:
-                        balance = START_BALANCE + manager.total_profit
-
-                    # --- lanzar operación en un hilo separado ---
-                    t = threading.Thread(
-                        target=execute_signal,
-                        args=(asset, signal, balance, analysis),
-                        daemon=True
-                    )
-                    t.start()
-
-                    # seguir escaneando otros pares sin esperar a que termine
-                    time.sleep(1)
-
-                    should_stop, reason = manager.should_stop_trading()
-                    if should_stop:
-                        print(f'\n🛑 STOPPING: {reason}')
-                        break
-                    
-                    time.sleep(2)
+                if offload:
+                    offload.submit(asset, candles, CANDLES_COUNT, TIMEFRAME_SEC)
+                    frames[asset] = df
+                    continue
+                
+                signal, analysis = strategy.analyze(df, asset=asset, timeframe=TIMEFRAME_SEC)
+                scheduler.update(asset, df, analysis)
+                
+                if correlation:
+                    if signal in ('call', 'put'):
+                        candidates.append((asset, signal, analysis, df['close'].tail(20).tolist()))
+                    continue
+                
+                if dispatch_signal(asset, signal, analysis, df['close'].tail(20).tolist()):
+                    break
             
             except Exception as e:
                 print(f'⚠️ Error processing {asset}: {e}')
-                time.sleep(0.5)
+                pause(0.5)
                 continue
         
+        if offload:
+            for asset, signal, analysis, pattern_closes in offload.collect():
+                scheduler.update(asset, frames.pop(asset, None), analysis)
+                if correlation:
+                    if signal in ('call', 'put'):
+                        candidates.append((asset, signal, analysis, pattern_closes))
+                    continue
+                if dispatch_signal(asset, signal, analysis, pattern_closes):
+                    break
+        
+        if candidates and dispatch_correlated(candidates):
+            # the stop condition is reported by the check at the top of the loop
+            continue
+        
         elapsed = time.time() - loop_start
         if elapsed < scan_interval:
-            time.sleep(scan_interval - elapsed)
+            if control:
+                # answer control requests while waiting for the next cycle
+                control.serve(handle_command, scan_interval - elapsed)
+            else:
+                time.sleep(scan_interval - elapsed)
     
+    if control:
+        control.close()
+    if offload:
+        offload.close()
+    if ticks:
+        ticks.stop()
+    if isinstance(conn, RecordingConnector):
+        conn.close()
     stats = manager.get_stats()
     print("\n" + "=" * 70)
     print("🏁 BOT STOPPED")
@@ -245,15 +628,47 @@ def main():
     print(f"   Total Profit/Loss: ${stats['total_profit']:.2f}")
     print(f"   Consecutive Losses: {stats['consecutive_losses']}")
     print(f"   Current Trade Amount: ${stats['current_amount']:.2f}")
+    cache_stats = strategy.cache.stats()
+    print(f"   Analysis Cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+          f"({cache_stats['hit_rate']*100:.1f}%)")
+    ind_stats = strategy.indicators.stats()
+    print(f"   Indicator Store: {ind_stats['nodes']} nodes over {ind_stats['assets']} assets, "
+          f"{ind_stats['hits']} shared / {ind_stats['misses']} computed windows")
+    if REPLAY_FILE:
+        print(f"   Replayed Calls: {conn.calls}")
+    if isinstance(conn, ConnectorPool):
+        print(f"📡 Connector Pool:")
+        for name, ep in conn.stats().items():
+            print(f"   {name:10} calls={ep['calls']} errors={ep['errors']} rejected={ep['rejected']} "
+                  f"rate={ep['rate']}/s state={ep['state']}")
+    acc = account.snapshot()
+    print(f"   Balance (mirror): ${acc['balance']:.2f} | {acc['reconciles']} reconciles, "
+          f"last drift ${acc['last_drift']:+.2f}")
+    if entry:
+        es = entry.stats()
+        print(f"⏱️ Entry Timing: {es['timed']}/{es['orders']} orders timed | offset {es['offset']*1000:+.0f}ms | "
+              f"RTT {es['rtt']*1000:.0f}ms")
+        if es['confirmed']:
+            print(f"   Skew vs target (broker open time, {es['confirmed']} orders): p50 {es['skew_p50']*1000:+.0f}ms | "
+                  f"p90 {es['skew_p90']*1000:+.0f}ms | p99 {es['skew_p99']*1000:+.0f}ms | "
+                  f"max |skew| {es['skew_max_abs']*1000:.0f}ms")
+        if es['timed']:
+            print(f"   Estimated skew at send: p50 {es['est_skew_p50']*1000:+.0f}ms | "
+                  f"p90 {es['est_skew_p90']*1000:+.0f}ms | p99 {es['est_skew_p99']*1000:+.0f}ms | "
+                  f"max |skew| {es['est_skew_max_abs']*1000:.0f}ms")
+    if shadow:
+        shadow.print_report()
+    memory.print_report()
     print("=" * 70)
 
-try:
-    main()
-except Exception as e:
-    import traceback
-    print('ERROR:', e)
-    traceback.print_exc()
-    input("Presiona ENTER para salir...")
-
 if __name__ == '__main__':
-    main()
+    # analysis worker processes re-import this module (spawn / frozen .exe):
+    # only the real entry point may start the bot
+    multiprocessing.freeze_support()
+    try:
+        main()
+    except Exception as e:
+        import traceback
+        print('ERROR:', e)
+        traceback.print_exc()
+        input("Presiona ENTER para salir...")
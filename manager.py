@@ -2,12 +2,20 @@ import csv
 import time
 import json
 import os
+import threading
 from datetime import datetime
 
+from ledger import PositionLedger
+
 class TradeManager:
     def __init__(self, connector, base_amount=1, martingale_multiplier=2.2, 
-                 take_profit=50, start_balance=24.65, max_losses=5):
+                 take_profit=50, start_balance=24.65, max_losses=5,
+                 max_concurrent=3, max_exposure=0, chain_mode='asset', entry=None, account=None):
         self.conn = connector
+        # optional EntryScheduler timing orders against the candle boundary
+        self.entry = entry
+        # optional AccountMirror: balance reads stay in memory instead of a get_balance RPC
+        self.account = account
         self.base_amount = float(base_amount)
         self.martingale_multiplier = float(martingale_multiplier)
         self.take_profit = float(take_profit)
@@ -16,15 +24,35 @@ class TradeManager:
         
         self.logfile = 'trades_log.csv'
         self.statefile = 'bot_state.json'
+        self.io_lock = threading.Lock()
+        # loss streak of a pre-ledger state file (one global chain): keeps counting
+        # toward MAX_LOSSES until the next win
+        self.legacy_losses = 0
         
-        self.current_amount = self.base_amount
-        self.consecutive_losses = 0
-        self.total_profit = 0
-        self.trade_count = 0
+        # open positions, martingale chains and aggregate P/L live in the ledger
+        self.ledger = PositionLedger(self.base_amount, self.martingale_multiplier,
+                                     max_concurrent, max_exposure, chain_mode)
         
         self._init_log()
         self._load_state()
     
+    @property
+    def total_profit(self):
+        return self.ledger.total_profit
+    
+    @property
+    def trade_count(self):
+        return self.ledger.trade_count
+    
+    @property
+    def consecutive_losses(self):
+        # worst chain: MAX_LOSSES applies to every martingale chain
+        return max(self.ledger.max_consecutive_losses(), self.legacy_losses)
+    
+    @property
+    def current_amount(self):
+        return self.ledger.max_amount()
+    
     def _init_log(self):
         try:
             with open(self.logfile, 'x', newline='') as f:
@@ -35,29 +63,82 @@ class TradeManager:
             pass
     
     def _save_state(self):
+        snap = self.ledger.snapshot()
         state = {
             'current_amount': self.current_amount,
             'consecutive_losses': self.consecutive_losses,
-            'total_profit': self.total_profit,
-            'trade_count': self.trade_count,
+            'total_profit': snap['total_profit'],
+            'trade_count': snap['trade_count'],
+            'chains': snap['chains'],
+            'legacy_losses': self.legacy_losses,
             'last_update': datetime.utcnow().isoformat()
         }
-        with open(self.statefile, 'w') as f:
-            json.dump(state, f, indent=2)
+        with self.io_lock:
+            tmp = self.statefile + '.tmp'
+            with open(tmp, 'w') as f:
+                json.dump(state, f, indent=2)
+            os.replace(tmp, self.statefile)
     
     def _load_state(self):
         if os.path.exists(self.statefile):
             try:
                 with open(self.statefile, 'r') as f:
                     state = json.load(f)
-                self.current_amount = state.get('current_amount', self.base_amount)
-                self.consecutive_losses = state.get('consecutive_losses', 0)
-                self.total_profit = state.get('total_profit', 0)
-                self.trade_count = state.get('trade_count', 0)
+                # states saved before per-chain tracking only have one global chain,
+                # which can't be attributed to an asset: chains restart at base amount,
+                # but its loss streak is kept so a bot stopped at MAX_LOSSES stays stopped
+                self.ledger.restore(state.get('total_profit', 0), state.get('trade_count', 0),
+                                    state.get('chains'))
+                if 'chains' in state:
+                    self.legacy_losses = int(state.get('legacy_losses', 0))
+                else:
+                    self.legacy_losses = int(state.get('consecutive_losses', 0))
                 print(f"📥 Loaded previous state: {self.consecutive_losses} losses, ${self.total_profit:.2f} profit")
             except:
                 print("⚠️ Could not load previous state, starting fresh")
     
+    # setting -> (type, minimum, minimum allowed itself)
+    SETTING_LIMITS = {
+        'base_amount': (float, 0, False),
+        'martingale_multiplier': (float, 1, True),
+        'take_profit': (float, 0, False),
+        'max_losses': (int, 1, True),
+        'max_concurrent': (int, 1, True),
+        'max_exposure': (float, 0, True),
+    }
+    
+    @classmethod
+    def validate_settings(cls, settings):
+        """Coerce configure() arguments to their types and check their ranges; raises ValueError."""
+        coerced = {}
+        for name, value in settings.items():
+            if name not in cls.SETTING_LIMITS:
+                raise ValueError(f"Unknown setting: {name}")
+            kind, minimum, inclusive = cls.SETTING_LIMITS[name]
+            try:
+                number = float(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"{name} must be a number, got {value!r}") from None
+            if isinstance(value, bool) or number != number or (kind is int and not number.is_integer()):
+                raise ValueError(f"{name} must be {'an integer' if kind is int else 'a number'}, got {value!r}")
+            if number < minimum or (number == minimum and not inclusive):
+                raise ValueError(f"{name} must be {'>=' if inclusive else '>'} {minimum}, got {value!r}")
+            coerced[name] = kind(number)
+        return coerced
+    
+    def configure(self, base_amount=None, martingale_multiplier=None, take_profit=None,
+                  max_losses=None, max_concurrent=None, max_exposure=None):
+        """Apply new money-management settings without restarting (see PositionLedger.configure)."""
+        if base_amount is not None:
+            self.base_amount = float(base_amount)
+        if martingale_multiplier is not None:
+            self.martingale_multiplier = float(martingale_multiplier)
+        if take_profit is not None:
+            self.take_profit = float(take_profit)
+        if max_losses is not None:
+            self.max_losses = int(max_losses)
+        self.ledger.configure(base_amount, martingale_multiplier, max_concurrent, max_exposure)
+    
     def should_stop_trading(self):
         if self.consecutive_losses >= self.max_losses:
             return True, f"Max losses ({self.max_losses}) reached"
@@ -67,84 +148,129 @@ class TradeManager:
         
         return False, None
     
+    def can_open(self, asset):
+        return self.ledger.check_open(asset)
+    
+    def current_balance(self, default=None):
+        if self.account:
+            return self.account.balance
+        try:
+            return float(self.conn.get_balance())
+        except Exception:
+            return self.start_balance + self.total_profit if default is None else default
+    
     def execute_trade(self, asset, direction, balance=None, analysis=None):
         timestamp = datetime.utcnow().isoformat()
         
-        if balance is None:
-            try:
-                balance = self.conn.Iq.get_balance()
-            except:
-                balance = self.start_balance + self.total_profit
-        
-        print(f"\n🎯 EXECUTING TRADE #{self.trade_count + 1}")
-        print(f"   Asset: {asset}")
-        print(f"   Direction: {direction.upper()}")
-        print(f"   Amount: ${self.current_amount:.2f}")
-        print(f"   Martingale Step: {self.consecutive_losses}")
-        print(f"   Balance: ${balance:.2f}")
-        
-        if analysis:
-            print(f"   📊 Analysis:")
-            print(f"      RSI: {analysis.get('rsi', 0):.1f}")
-            print(f"      EMA10: {analysis.get('ema10', 0):.4f} | EMA20: {analysis.get('ema20', 0):.4f}")
-            print(f"      MACD Histogram: {analysis.get('macd_hist', 0):.4f}")
-            print(f"      Confidence: {analysis.get('confidence', 0)*100:.1f}%")
-        
-        traded_amount = self.current_amount
-        
-        response = self.conn.buy_asset(asset, traded_amount, direction, expiration_minutes=1)
-        
-        if not response:
-            print(f"   ❌ Trade execution failed")
-            self._log(timestamp, asset, direction, traded_amount, 'error', 
-                     balance, self.total_profit, self.consecutive_losses, 'execution_failed')
+        pos = self.ledger.open_position(asset, direction)
+        if pos is None:
+            _, reason = self.ledger.check_open(asset)
+            print(f"\n⏸️ Skipping {asset} {direction.upper()}: {reason}")
             return None
         
-        print(f"   ⏳ Waiting for trade to close (65s)...")
-        time.sleep(65)
+        response = None
+        try:
+            if balance is None:
+                balance = self.current_balance()
+        
+            print(f"\n🎯 EXECUTING TRADE #{self.trade_count + 1}")
+            print(f"   Asset: {asset}")
+            print(f"   Direction: {direction.upper()}")
+            print(f"   Amount: ${pos.amount:.2f}")
+            print(f"   Martingale Step: {pos.step}")
+            print(f"   Balance: ${balance:.2f}")
         
-        result_status = self.conn.check_trade_result(response)
+            if analysis:
+                print(f"   📊 Analysis:")
+                print(f"      RSI: {analysis.get('rsi', 0):.1f}")
+                print(f"      EMA10: {analysis.get('ema10', 0):.4f} | EMA20: {analysis.get('ema20', 0):.4f}")
+                print(f"      MACD Histogram: {analysis.get('macd_hist', 0):.4f}")
+                print(f"      Confidence: {analysis.get('confidence', 0)*100:.1f}%")
         
-        if result_status == 'win':
-            payout = traded_amount * 0.80
-            self.total_profit += payout
-            self.consecutive_losses = 0
-            self.current_amount = self.base_amount
-            
-            print(f"   ✅ WIN! Profit: ${payout:.2f} | Total: ${self.total_profit:.2f}")
-            
-            self._log(timestamp, asset, direction, traded_amount, 'win', 
-                     balance, self.total_profit, 0, str(response))
+            traded_amount = pos.amount
+        
+            entry_target = None
+            if self.entry:
+                response, entry_target = self.entry.place(
+                    lambda: self.conn.buy_asset(asset, traded_amount, direction, expiration_minutes=1))
+            else:
+                response = self.conn.buy_asset(asset, traded_amount, direction, expiration_minutes=1)
+        
+            if not response:
+                self.ledger.cancel_position(pos.id)
+                print(f"   ❌ Trade execution failed")
+                self._log(timestamp, asset, direction, traded_amount, 'error', 
+                         balance, self.total_profit, pos.step, 'execution_failed')
+                return None
+            if self.account:
+                self.account.on_order(pos.id, traded_amount)
         
-        elif result_status == 'loss':
-            self.total_profit -= traded_amount
-            self.consecutive_losses += 1
-            self.current_amount = round(traded_amount * self.martingale_multiplier, 2)
+            print(f"   ⏳ Waiting for trade to close (65s)...")
+            time.sleep(65)
+        
+            result_status = self.conn.check_trade_result(response)
+            profit, chain = self.ledger.close_position(pos.id, result_status)
+            if result_status == 'win':
+                self.legacy_losses = 0
+            if self.account:
+                self.account.on_result(pos.id, result_status, profit)
+            if entry_target is not None:
+                self.entry.record_open(entry_target, self.conn.get_position_open_time(response))
+            total_profit = self.total_profit
+        
+            if result_status == 'win':
+                print(f"   ✅ WIN [{asset}]! Profit: ${profit:.2f} | Total: ${total_profit:.2f}")
             
-            print(f"   ❌ LOSS! -${traded_amount:.2f} | Total: ${self.total_profit:.2f}")
-            print(f"   📈 Next amount: ${self.current_amount:.2f} (Step {self.consecutive_losses})")
+                self._log(timestamp, asset, direction, traded_amount, 'win', 
+                         balance, total_profit, 0, self._trade_ref(response))
+        
+            elif result_status == 'loss':
+                print(f"   ❌ LOSS [{asset}]! -${traded_amount:.2f} | Total: ${total_profit:.2f}")
+                print(f"   📈 Next amount: ${chain['amount']:.2f} (Step {chain['losses']})")
             
-            self._log(timestamp, asset, direction, traded_amount, 'loss', 
-                     balance, self.total_profit, self.consecutive_losses, str(response))
+                self._log(timestamp, asset, direction, traded_amount, 'loss', 
+                         balance, total_profit, chain['losses'], self._trade_ref(response))
         
-        else:
-            print(f"   ⚠️ Unknown result, treating as loss for safety")
-            self.total_profit -= traded_amount
-            self.consecutive_losses += 1
-            self.current_amount = round(traded_amount * self.martingale_multiplier, 2)
+            else:
+                print(f"   ⚠️ Unknown result [{asset}], treating as loss for safety")
             
-            self._log(timestamp, asset, direction, traded_amount, 'unknown', 
-                     balance, self.total_profit, self.consecutive_losses, str(response))
+                self._log(timestamp, asset, direction, traded_amount, 'unknown', 
+                         balance, total_profit, chain['losses'], self._trade_ref(response))
         
-        self.trade_count += 1
-        self._save_state()
+            self._save_state()
         
-        return result_status
+            return result_status
+        finally:
+            # an exception must not leave the asset's reservation open forever
+            self._release(pos, response)
+    
+    def _release(self, pos, response):
+        """Settle a position still open after an error: unknown result if the order went out, else cancel."""
+        if pos.id not in self.ledger.positions:
+            return
+        if response:
+            profit, _ = self.ledger.close_position(pos.id, 'unknown')
+            if self.account:
+                self.account.on_result(pos.id, 'unknown', profit)
+            print(f"   ⚠️ {pos.asset} position closed as unknown after an error")
+            self._save_state()
+        else:
+            self.ledger.cancel_position(pos.id)
+    
+    @staticmethod
+    def _trade_ref(response):
+        # keep only the broker's order id in the log, not the whole response object
+        if isinstance(response, tuple) and len(response) == 2:
+            return str(response[1])
+        if isinstance(response, dict):
+            return str(response.get('id') or response.get('position_id') or response.get('order_id') or '')
+        return str(response)
     
     def _log(self, ts, asset, direction, amount, result, balance, profit, martingale_step, info=''):
-        with open(self.logfile, 'a', newline='') as f:
-            w = csv.writer(f)
-            w.writerow([ts, asset, direction, amount, result, balance, profit, martingale_step, info])
+        with self.io_lock:
+            with open(self.logfile, 'a', newline='') as f:
+                w = csv.writer(f)
+                w.writerow([ts, asset, direction, amount, result, balance, profit, martingale_step, info])
     
     def get_stats(self):
         return {
@@ -153,7 +279,9 @@ class TradeManager:
             'total_profit': self.total_profit,
             'trade_count': self.trade_count,
             'profit_target': self.take_profit,
-            'max_losses': self.max_losses
+            'max_losses': self.max_losses,
+            'open_positions': len(self.ledger.positions),
+            'exposure': self.ledger.exposure()
         }
 
     def run_sequential(self, asset, direction, balance, execute_fn):
@@ -163,18 +291,13 @@ class TradeManager:
         """
         print(f"\n⚙️ Starting Martingale sequence for {asset} ({direction.upper()})")
 
-        self._load_state()
-        stake = float(self.current_amount)
         seq = 0
 
         # Si no se pasa balance, intenta obtenerlo desde IQ Option
         try:
             start_balance = float(balance)
         except Exception:
-            try:
-                start_balance = float(self.conn.Iq.get_balance())
-            except Exception:
-                start_balance = 0.0
+            start_balance = self.current_balance(0.0)
 
         while True:
             seq += 1
@@ -183,69 +306,61 @@ class TradeManager:
                 print(f"🛑 {asset} - {reason}")
                 break
 
+            pos = self.ledger.open_position(asset, direction)
+            if pos is None:
+                _, reason = self.ledger.check_open(asset)
+                print(f"[{asset}] ⏸️ Cannot open position: {reason}")
+                break
+            stake = pos.amount
+
             print(f"\n[{asset}] ▶️ Step {seq}: Placing {direction.upper()} ${stake:.2f}")
             
-            before_bal = 0.0
+            res = None
             try:
-                before_bal = float(self.conn.Iq.get_balance())
-            except Exception:
-                pass
-
-            # Ejecuta la operación usando la función que recibe como parámetro
-            res = execute_fn(asset, stake, direction)
-            if not res:
-                print(f"[{asset}] ❌ Failed to place order, stopping sequence.")
-                break
+                # Ejecuta la operación usando la función que recibe como parámetro
+                res = execute_fn(asset, stake, direction)
+                if not res:
+                    self.ledger.cancel_position(pos.id)
+                    print(f"[{asset}] ❌ Failed to place order, stopping sequence.")
+                    break
+                if self.account:
+                    self.account.on_order(pos.id, stake)
 
-            print(f"[{asset}] ⏳ Waiting for trade result (65s)...")
-            time.sleep(65)
+                print(f"[{asset}] ⏳ Waiting for trade result (65s)...")
+                time.sleep(65)
 
-            # Verifica el resultado
-            result_status = self.conn.check_trade_result(res)
-            profit = 0.0
-            outcome_text = "unknown"
+                # Verifica el resultado
+                result_status = self.conn.check_trade_result(res)
+                profit, chain = self.ledger.close_position(pos.id, result_status)
+                if result_status == 'win':
+                    self.legacy_losses = 0
+                if self.account:
+                    self.account.on_result(pos.id, result_status, profit)
+            finally:
+                self._release(pos, res)
 
             if result_status == 'win':
-                payout = stake * 0.8
-                profit = payout
-                self.total_profit += payout
-                self.consecutive_losses = 0
-                self.current_amount = self.base_amount
                 outcome_text = "✅ WIN"
             elif result_status == 'loss':
-                profit = -stake
-                self.total_profit -= stake
-                self.consecutive_losses += 1
-                self.current_amount = round(stake * self.martingale_multiplier, 2)
                 outcome_text = "❌ LOSS"
             else:
-                profit = -stake
-                self.total_profit -= stake
-                self.consecutive_losses += 1
-                self.current_amount = round(stake * self.martingale_multiplier, 2)
                 outcome_text = "⚠️ UNKNOWN"
 
-            after_bal = 0.0
-            try:
-                after_bal = float(self.conn.Iq.get_balance())
-            except Exception:
-                pass
+            after_bal = self.current_balance(0.0)
 
             timestamp = datetime.utcnow().isoformat()
-            self._log(timestamp, asset, direction, stake, result_status, after_bal, profit, self.consecutive_losses, f"{outcome_text} seq#{seq}")
+            self._log(timestamp, asset, direction, stake, result_status, after_bal, profit, chain['losses'], f"{outcome_text} seq#{seq}")
             self._save_state()
 
-            print(f"[{asset}] {outcome_text} | Profit: {profit:.2f} | Total: {self.total_profit:.2f} | Next stake: {self.current_amount:.2f}")
+            print(f"[{asset}] {outcome_text} | Profit: {profit:.2f} | Total: {self.total_profit:.2f} | Next stake: {chain['amount']:.2f}")
 
             if result_status == 'win':
                 print(f"[{asset}] ✅ Sequence ended after win.")
                 break
 
-            if self.consecutive_losses >= self.max_losses:
+            if chain['losses'] >= self.max_losses:
                 print(f"[{asset}] 🛑 Max losses reached ({self.max_losses}).")
                 break
 
-            stake = self.current_amount
-
         print(f"🏁 Finished Martingale sequence for {asset}")
         return self.get_stats()
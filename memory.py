@@ -0,0 +1,106 @@
+# memory.py - per-subsystem memory accounting with budgets and eviction
+import os
+import sys
+
+UNITS = {'': 1, 'B': 1, 'K': 1 << 10, 'KB': 1 << 10, 'M': 1 << 20, 'MB': 1 << 20, 'G': 1 << 30, 'GB': 1 << 30}
+
+
+def parse_size(text):
+    """'64MB', '512kb', '1048576' -> bytes."""
+    text = str(text).strip().upper()
+    number = text.rstrip('KMGB')
+    return int(float(number) * UNITS[text[len(number):]])
+
+
+def parse_budgets(text):
+    """'candles=64MB,patterns=32MB' -> {'candles': 67108864, 'patterns': 33554432}."""
+    budgets = {}
+    for part in filter(None, (p.strip() for p in str(text).split(','))):
+        name, _, size = part.partition('=')
+        budgets[name.strip()] = parse_size(size)
+    return budgets
+
+
+def format_size(n):
+    for unit in ('B', 'KB', 'MB'):
+        if abs(n) < 1024:
+            return f"{n:.0f}{unit}" if unit == 'B' else f"{n:.1f}{unit}"
+        n /= 1024
+    return f"{n:.2f}GB"
+
+
+def rss_bytes():
+    """Current resident set size (Linux /proc), falling back to the peak from getrusage."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+    except (ImportError, OSError):
+        return 0
+
+
+class MemoryMonitor:
+    """
+    Sums the bytes held by each registered subsystem and keeps them within budget.
+
+    A subsystem is a list of components exposing memory_bytes() and, if they can
+    drop data, trim(max_bytes). When a subsystem is over budget, trim() is called
+    on its components in registration order with the bytes left for each, so the
+    first ones registered (the caches that are cheapest to rebuild) give way first.
+    Subsystems with no trimmable component (fixed-size stores) are only reported.
+    """
+
+    def __init__(self, budgets=None):
+        self.budgets = dict(budgets or {})
+        self.subsystems = {}
+        self.evictions = {}
+
+    def register(self, subsystem, component):
+        self.subsystems.setdefault(subsystem, []).append(component)
+
+    def usage(self):
+        return {name: sum(c.memory_bytes() for c in components)
+                for name, components in self.subsystems.items()}
+
+    def enforce(self):
+        """Trim subsystems over budget. Returns {subsystem: bytes freed}."""
+        freed = {}
+        for name, components in self.subsystems.items():
+            budget = self.budgets.get(name)
+            if not budget or not any(hasattr(c, 'trim') for c in components):
+                continue
+            sizes = [c.memory_bytes() for c in components]
+            over = sum(sizes) - budget
+            if over <= 0:
+                continue
+            before = sum(sizes)
+            for component, size in zip(components, sizes):
+                if over <= 0 or not hasattr(component, 'trim'):
+                    continue
+                component.trim(max(size - over, 0))
+                over -= size - component.memory_bytes()
+            freed[name] = before - sum(c.memory_bytes() for c in components)
+            self.evictions[name] = self.evictions.get(name, 0) + 1
+        return freed
+
+    def report(self):
+        usage = self.usage()
+        return {
+            'rss': rss_bytes(),
+            'tracked': sum(usage.values()),
+            'subsystems': {name: {'bytes': used, 'budget': self.budgets.get(name, 0),
+                                  'evictions': self.evictions.get(name, 0)}
+                           for name, used in usage.items()},
+        }
+
+    def print_report(self):
+        report = self.report()
+        print(f"🧠 Memory: RSS {format_size(report['rss'])} | tracked {format_size(report['tracked'])}")
+        for name, s in report['subsystems'].items():
+            budget = f" / {format_size(s['budget'])}" if s['budget'] else ''
+            print(f"   {name:16} {format_size(s['bytes'])}{budget} (evictions: {s['evictions']})")
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Vectorized Monte Carlo simulator for martingale risk of ruin.
+
+Reproduces the TradeManager / PositionLedger accounting per martingale chain:
+ - WIN:  total_profit += stake * PAYOUT, the chain's stake resets to base_amount
+ - LOSS: total_profit -= stake, stake = round(stake * multiplier, 2)
+ - a session stops when any chain's consecutive losses reach max_losses (ruin)
+   or total_profit >= take_profit (target reached)
+
+--chains models MAX_CONCURRENT independent chains that all hold a position
+on every step and settle together, i.e. the bot with every slot busy. That is
+the most exposed case; with fewer concurrent signals real sessions trade fewer
+chains at once. --chains 1 is exact for MAX_CONCURRENT=1.
+
+All sessions advance together one trade per step as NumPy arrays, so
+millions of sessions finish in seconds.
+
+Usage:
+    python montecarlo.py --win-rate 0.55 0.60 --sessions 1000000
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+from dotenv import load_dotenv
+
+PAYOUT = 0.80
+
+
+def stake_ladder(base_amount, martingale_multiplier, max_losses):
+    """Stake for each consecutive-loss step, rounded exactly as execute_trade does."""
+    stakes = [float(base_amount)]
+    for _ in range(max(int(max_losses) - 1, 0)):
+        stakes.append(round(stakes[-1] * float(martingale_multiplier), 2))
+    return np.array(stakes)
+
+
+def simulate(win_rate, sessions=1_000_000, base_amount=1, martingale_multiplier=2.2,
+             take_profit=50, max_losses=5, max_trades=10_000, chunk_size=1_000_000, seed=None,
+             chains=1):
+    """
+    Simulate independent trading sessions of `chains` parallel martingale chains.
+    Returns a dict with per-session arrays: 'profit', 'trades', 'max_drawdown'
+    and 'outcome' (1 = take profit, -1 = max losses, 0 = hit max_trades).
+    """
+    rng = np.random.default_rng(seed)
+    stakes = stake_ladder(base_amount, martingale_multiplier, max_losses)
+    max_losses = int(max_losses)
+    take_profit = float(take_profit)
+    chains = max(int(chains), 1)
+    chunk_size = max(chunk_size // chains, 1)
+
+    out_profit = np.empty(sessions)
+    out_trades = np.empty(sessions, dtype=np.int32)
+    out_drawdown = np.empty(sessions)
+    out_outcome = np.zeros(sessions, dtype=np.int8)
+
+    for start in range(0, sessions, chunk_size):
+        n = min(chunk_size, sessions - start)
+        profit = np.zeros(n)
+        losses = np.zeros((n, chains), dtype=np.int32)
+        trades = np.zeros(n, dtype=np.int32)
+        drawdown = np.zeros(n)
+        outcome = np.zeros(n, dtype=np.int8)
+        active = np.arange(n)
+
+        for _ in range(max_trades):
+            if active.size == 0:
+                break
+            stake = stakes[losses[active]]
+            win = rng.random((active.size, chains)) < win_rate
+
+            p = profit[active] + np.where(win, stake * PAYOUT, -stake).sum(axis=1)
+            k = np.where(win, 0, losses[active] + 1)
+            profit[active] = p
+            losses[active] = k
+            trades[active] += chains
+            drawdown[active] = np.maximum(drawdown[active], -p)
+
+            ruined = (k >= max_losses).any(axis=1)
+            target = ~ruined & (p >= take_profit)
+            outcome[active[ruined]] = -1
+            outcome[active[target]] = 1
+            active = active[~(ruined | target)]
+
+        sl = slice(start, start + n)
+        out_profit[sl] = profit
+        out_trades[sl] = trades
+        out_drawdown[sl] = drawdown
+        out_outcome[sl] = outcome
+
+    return {
+        'profit': out_profit,
+        'trades': out_trades,
+        'max_drawdown': out_drawdown,
+        'outcome': out_outcome,
+    }
+
+
+def summarize(result, start_balance=None):
+    profit = result['profit']
+    drawdown = result['max_drawdown']
+    outcome = result['outcome']
+    pct = [1, 5, 25, 50, 75, 95, 99]
+    summary = {
+        'sessions': len(profit),
+        'ruin_probability': float((outcome == -1).mean()),
+        'target_probability': float((outcome == 1).mean()),
+        'unfinished_probability': float((outcome == 0).mean()),
+        'mean_profit': float(profit.mean()),
+        'mean_trades': float(result['trades'].mean()),
+        'profit_percentiles': dict(zip(pct, np.percentile(profit, pct).tolist())),
+        'capital_percentiles': dict(zip(pct, np.percentile(drawdown, pct).tolist())),
+        'capital_max': float(drawdown.max()),
+    }
+    if start_balance is not None:
+        summary['balance_exceeded_probability'] = float((drawdown > float(start_balance)).mean())
+    return summary
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description='Monte Carlo risk of ruin for the martingale TradeManager')
+    parser.add_argument('--win-rate', type=float, nargs='+', required=True)
+    parser.add_argument('--sessions', type=int, default=1_000_000)
+    parser.add_argument('--base-amount', type=float, default=float(os.getenv('BASE_AMOUNT', 1)))
+    parser.add_argument('--multiplier', type=float, default=float(os.getenv('MARTINGALE_MULTIPLIER', 2.2)))
+    parser.add_argument('--take-profit', type=float, default=float(os.getenv('TAKE_PROFIT', 50)))
+    parser.add_argument('--max-losses', type=int, default=int(os.getenv('MAX_LOSSES', 5)))
+    parser.add_argument('--chains', type=int, default=int(os.getenv('MAX_CONCURRENT', 1)),
+                        help='Parallel martingale chains (MAX_CONCURRENT), all trading every step')
+    parser.add_argument('--start-balance', type=float, default=float(os.getenv('START_BALANCE', 24.65)))
+    parser.add_argument('--max-trades', type=int, default=10_000)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    ladder = stake_ladder(args.base_amount, args.multiplier, args.max_losses)
+    print("=" * 70)
+    print("🎲 MARTINGALE MONTE CARLO")
+    print("=" * 70)
+    print(f"   Base Amount: ${args.base_amount} | Multiplier: {args.multiplier}x | "
+          f"Take Profit: ${args.take_profit} | Max Losses: {args.max_losses} | Chains: {args.chains}")
+    print(f"   Stake ladder: {', '.join(f'${s:.2f}' for s in ladder)}")
+    print(f"   Capital to survive a full losing chain: ${ladder.sum():.2f}"
+          + (f" (x{args.chains} chains: ${ladder.sum() * args.chains:.2f})" if args.chains > 1 else ''))
+
+    for win_rate in args.win_rate:
+        start = time.time()
+        result = simulate(win_rate, args.sessions, args.base_amount, args.multiplier,
+                          args.take_profit, args.max_losses, args.max_trades, seed=args.seed,
+                          chains=args.chains)
+        s = summarize(result, args.start_balance)
+        pp, cp = s['profit_percentiles'], s['capital_percentiles']
+
+        print(f"\n📊 Win rate {win_rate*100:.1f}% ({s['sessions']:,} sessions in {time.time() - start:.1f}s)")
+        print(f"   Risk of ruin (max losses first): {s['ruin_probability']*100:.2f}%")
+        print(f"   Take profit reached first:        {s['target_probability']*100:.2f}%")
+        if s['unfinished_probability']:
+            print(f"   Unfinished after {args.max_trades} trades:   {s['unfinished_probability']*100:.2f}%")
+        print(f"   Mean session P/L: ${s['mean_profit']:.2f} over {s['mean_trades']:.1f} trades")
+        print(f"   Session P/L  p5/p50/p95: ${pp[5]:.2f} / ${pp[50]:.2f} / ${pp[95]:.2f}")
+        print(f"   Capital req. p50/p95/p99/max: ${cp[50]:.2f} / ${cp[95]:.2f} / ${cp[99]:.2f} / ${s['capital_max']:.2f}")
+        print(f"   Drawdown exceeds start balance (${args.start_balance}): "
+              f"{s['balance_exceeded_probability']*100:.2f}%")
+    print("=" * 70)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,211 @@
+# offload.py - analysis offload to a process pool over shared-memory candle buffers
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from strategy import AdvancedStrategy
+
+FIELDS = ['ts', 'open', 'high', 'low', 'close', 'volume']
+LENGTH, HEAD, VERSION = 0, 1, 2
+
+
+def _attach(name):
+    # workers only borrow the segments; keep the resource tracker from unlinking them
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13
+        return shared_memory.SharedMemory(name=name)
+
+
+class SharedCandleStore:
+    """
+    Per-asset candle ring buffers in multiprocessing.shared_memory.
+
+    Each slot stores every bar twice (at i and i + capacity) so the most recent
+    `length` bars are always one contiguous slice - workers read windows as
+    zero-copy NumPy views. A per-slot version counter works as a seqlock:
+    odd while the parent is writing, readers retry if it changed under them.
+    Slots of released assets are emptied and reused by the next new asset.
+    """
+
+    def __init__(self, max_assets, capacity=256, create=True, names=None):
+        self.max_assets = int(max_assets)
+        self.capacity = int(capacity)
+        data_shape = (self.max_assets, 2 * self.capacity, len(FIELDS))
+        meta_shape = (self.max_assets, 3)
+        if create:
+            self.data_shm = shared_memory.SharedMemory(create=True, size=int(np.prod(data_shape)) * 8)
+            self.meta_shm = shared_memory.SharedMemory(create=True, size=int(np.prod(meta_shape)) * 8)
+        else:
+            self.data_shm = _attach(names[0])
+            self.meta_shm = _attach(names[1])
+        self.data = np.ndarray(data_shape, dtype=np.float64, buffer=self.data_shm.buf)
+        self.meta = np.ndarray(meta_shape, dtype=np.int64, buffer=self.meta_shm.buf)
+        if create:
+            self.meta[:] = 0
+        self.owner = create
+        self.slots = {}
+        self.free = []
+
+    @property
+    def names(self):
+        return self.data_shm.name, self.meta_shm.name
+
+    def available(self):
+        """Slots still free for new assets."""
+        return self.max_assets - len(self.slots)
+
+    def slot(self, asset):
+        if asset not in self.slots:
+            if not self.available():
+                raise RuntimeError(f"SharedCandleStore full ({self.max_assets} assets)")
+            self.slots[asset] = self.free.pop() if self.free else len(self.slots)
+        return self.slots[asset]
+
+    def release(self, asset):
+        """Empty an asset's slot and make it reusable."""
+        s = self.slots.pop(asset, None)
+        if s is None:
+            return
+        meta = self.meta[s]
+        meta[VERSION] += 1
+        meta[LENGTH] = meta[HEAD] = 0
+        meta[VERSION] += 1
+        self.free.append(s)
+
+    def write(self, asset, candles):
+        """Merge connector candle dicts into the asset's ring (new ts appended, same ts updated)."""
+        s = self.slot(asset)
+        meta, cap = self.meta[s], self.capacity
+        last_ts = self.data[s, (meta[HEAD] - 1) % cap, 0] if meta[LENGTH] else -np.inf
+
+        # usually only the forming bar and maybe one new bar: walk back from the end
+        fresh = []
+        for c in reversed(candles):
+            if c.get('ts') is None or c['ts'] < last_ts:
+                break
+            fresh.append(c)
+            if c['ts'] == last_ts:
+                break
+        if not fresh:
+            return s
+        rows = np.array([[np.nan if c.get(f) is None else c.get(f) for f in FIELDS] for c in reversed(fresh)],
+                        dtype=np.float64)
+
+        meta[VERSION] += 1
+        try:
+            for row in rows:
+                length, head = meta[LENGTH], meta[HEAD]
+                if length and row[0] == last_ts:
+                    head = (head - 1) % cap
+                else:
+                    meta[HEAD] = (head + 1) % cap
+                    meta[LENGTH] = min(length + 1, cap)
+                self.data[s, head] = row
+                self.data[s, head + cap] = row
+                last_ts = row[0]
+        finally:
+            meta[VERSION] += 1
+        return s
+
+    def view(self, slot, count=None):
+        """Zero-copy view of the latest `count` bars of a slot (may change while read)."""
+        meta, cap = self.meta[slot], self.capacity
+        length, head = int(meta[LENGTH]), int(meta[HEAD])
+        n = length if count is None else min(int(count), length)
+        end = head + cap
+        return self.data[slot, end - n:end]
+
+    def read_frame(self, slot, count=None, retries=50):
+        for _ in range(retries):
+            v1 = int(self.meta[slot, VERSION])
+            if v1 % 2 == 0:
+                frame = pd.DataFrame(self.view(slot, count), columns=FIELDS)
+                if int(self.meta[slot, VERSION]) == v1:
+                    return frame
+            time.sleep(0.001)
+        raise RuntimeError(f"slot {slot} kept changing while being read")
+
+    def closes(self, asset, count=20):
+        return self.view(self.slots[asset], count)[:, FIELDS.index('close')].tolist()
+
+    def memory_bytes(self):
+        return self.data.nbytes + self.meta.nbytes
+
+    def close(self):
+        self.data_shm.close()
+        self.meta_shm.close()
+        if self.owner:
+            self.data_shm.unlink()
+            self.meta_shm.unlink()
+
+
+# --- worker process state ---
+_STORE = None
+_STRATEGIES = {}
+
+
+def _init_worker(max_assets, capacity, names):
+    global _STORE
+    _STORE = SharedCandleStore(max_assets, capacity, create=False, names=names)
+
+
+def _analyze_task(asset, slot, count, params, timeframe):
+    key = tuple(sorted(params.items()))
+    strategy = _STRATEGIES.get(key)
+    if strategy is None:
+        strategy = _STRATEGIES[key] = AdvancedStrategy(params)
+    df = _STORE.read_frame(slot, count)
+    # asset=None: pattern history lives in the parent, applied there on return
+    signal, analysis = strategy.analyze(df, timeframe=timeframe)
+    if analysis:
+        analysis = {k: float(v) for k, v in analysis.items()}
+    return asset, signal, analysis
+
+
+class AnalysisOffload:
+    """
+    Runs AdvancedStrategy.analyze in worker processes. The parent writes candles
+    into SharedCandleStore and submits only (asset, slot, params); workers return
+    (asset, signal, analysis) records. collect() finishes each record with the
+    parent strategy's pattern-history bonus.
+    """
+
+    def __init__(self, strategy, workers, max_assets, capacity=256):
+        self.strategy = strategy
+        self.store = SharedCandleStore(max_assets, capacity)
+        self.pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                        initargs=(self.store.max_assets, self.store.capacity, self.store.names))
+        self.pending = []
+
+    def submit(self, asset, candles, count, timeframe=None):
+        slot = self.store.write(asset, candles)
+        future = self.pool.submit(_analyze_task, asset, slot, count, self.strategy.params, timeframe)
+        self.pending.append(future)
+
+    def collect(self):
+        """Yield (asset, signal, analysis, pattern_closes) for every submitted analysis."""
+        pending, self.pending = self.pending, []
+        for future in pending:
+            try:
+                asset, signal, analysis = future.result()
+            except Exception as e:
+                print(f'⚠️ Offloaded analysis failed: {e}')
+                continue
+            if asset not in self.store.slots:
+                # removed while its analysis was running
+                continue
+            pattern_closes = self.store.closes(asset, 20)
+            if analysis:
+                signal, analysis = self.strategy.apply_pattern_history(asset, analysis, pattern_closes)
+            yield asset, signal, analysis, pattern_closes
+
+    def release(self, asset):
+        self.store.release(asset)
+
+    def close(self):
+        self.pool.shutdown(wait=True, cancel_futures=True)
+        self.store.close()
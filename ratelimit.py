@@ -0,0 +1,147 @@
+# ratelimit.py - token-bucket limiter and circuit breaker for broker endpoints
+import threading
+import time
+
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+    acquire() blocks exactly as long as needed for a token instead of a fixed sleep.
+    The refill rate adapts (AIMD): penalize() halves it after a throttled/failed
+    call, reward() creeps it back up towards max_rate after successes.
+    """
+
+    def __init__(self, rate, burst=None, min_rate=None):
+        self.max_rate = float(rate)
+        self.rate = float(rate)
+        self.min_rate = float(min_rate) if min_rate else self.max_rate / 8
+        self.capacity = float(burst if burst is not None else max(1.0, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, tokens=1, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return True
+                wait = (tokens - self.tokens) / self.rate
+            if deadline is not None and now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    def penalize(self):
+        with self.lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+
+    def reward(self, step=None):
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + (step or self.max_rate / 20))
+
+
+class CircuitBreaker:
+    """
+    closed -> open after `threshold` consecutive failures.
+    open -> half_open once the backoff expires; one trial call is let through.
+    A failed trial reopens the circuit with a doubled backoff (up to max_backoff);
+    a success closes it and resets the backoff.
+    """
+
+    def __init__(self, threshold=5, backoff=1.0, max_backoff=60.0):
+        self.threshold = int(threshold)
+        self.base_backoff = float(backoff)
+        self.max_backoff = float(max_backoff)
+        self.backoff = self.base_backoff
+        self.failures = 0
+        self.state = 'closed'
+        self.opened_at = 0.0
+        self.lock = threading.Lock()
+
+    def allow(self):
+        with self.lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and time.monotonic() - self.opened_at >= self.backoff:
+                self.state = 'half_open'
+                return True
+            return False
+
+    def retry_after(self):
+        with self.lock:
+            if self.state != 'open':
+                return 0.0
+            return max(0.0, self.backoff - (time.monotonic() - self.opened_at))
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.state = 'closed'
+            self.backoff = self.base_backoff
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.state == 'half_open':
+                self.backoff = min(self.max_backoff, self.backoff * 2)
+                self._open()
+            elif self.failures >= self.threshold:
+                self._open()
+
+    def _open(self):
+        self.state = 'open'
+        self.opened_at = time.monotonic()
+
+
+class Endpoint:
+    """A token bucket plus circuit breaker guarding one class of broker calls."""
+
+    def __init__(self, name, rate, burst=None, threshold=5, backoff=1.0, max_backoff=60.0):
+        self.name = name
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker(threshold, backoff, max_backoff)
+        self.calls = 0
+        self.errors = 0
+        self.rejected = 0
+
+    def call(self, fn, *args, is_failure=None, **kwargs):
+        if not self.breaker.allow():
+            self.rejected += 1
+            raise CircuitOpenError(f"{self.name} circuit open, retry in {self.breaker.retry_after():.1f}s")
+        self.bucket.acquire()
+        self.calls += 1
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self.errors += 1
+            self.breaker.record_failure()
+            self.bucket.penalize()
+            raise
+        if is_failure is not None and is_failure(result):
+            self.errors += 1
+            self.breaker.record_failure()
+            self.bucket.penalize()
+        else:
+            self.breaker.record_success()
+            self.bucket.reward()
+        return result
+
+    def stats(self):
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'rejected': self.rejected,
+            'rate': round(self.bucket.rate, 2),
+            'state': self.breaker.state,
+        }
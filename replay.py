@@ -0,0 +1,350 @@
+# replay.py - record and replay broker traffic for deterministic load tests
+import bisect
+import gzip
+import json
+import os
+import re
+import threading
+import time as _time
+import zlib
+
+# argument names/defaults of the connector methods, used to normalise calls
+SIGNATURES = {
+    'connect': (),
+    'get_all_assets': (),
+    'get_payouts': (),
+    'get_balance': (),
+    'get_candles': (('asset', None), ('timeframe_seconds', 60), ('count', 100)),
+    'detect_asset_type': (('asset', None),),
+    'buy_asset': (('asset', None), ('amount', None), ('direction', None), ('expiration_minutes', 1)),
+    'check_trade_result': (('response', None),),
+    'get_position_open_time': (('response', None),),
+    'start_stream': (('asset', None), ('size', 1), ('maxdict', 300)),
+    'stop_stream': (('asset', None), ('size', 1)),
+    'get_realtime_candles': (('asset', None), ('size', 1), ('since', 0)),
+}
+
+# arguments left out of the replay lookup key (the answer is filtered by them instead)
+UNKEYED = {'get_realtime_candles': ('since',)}
+
+# calls answered in recorded order rather than by timestamp
+SEQUENTIAL = ('buy_asset', 'check_trade_result')
+
+
+def normalize_args(method, args, kwargs):
+    names = SIGNATURES[method]
+    bound = {name: default for name, default in names}
+    for (name, _), value in zip(names, args):
+        bound[name] = value
+    bound.update(kwargs)
+    return bound
+
+
+def _encode(value):
+    if isinstance(value, tuple):
+        return {'__tuple__': [_encode(v) for v in value]}
+    if isinstance(value, list):
+        return [_encode(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): _encode(v) for k, v in value.items()}
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return repr(value)
+
+
+def _decode(value):
+    if isinstance(value, dict):
+        if '__tuple__' in value:
+            return tuple(_decode(v) for v in value['__tuple__'])
+        return {k: _decode(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_decode(v) for v in value]
+    return value
+
+
+def _lookup_key(method, bound):
+    bound = {k: v for k, v in bound.items() if k not in UNKEYED.get(method, ())}
+    return method + json.dumps(_encode(bound), sort_keys=True)
+
+
+def _split_segment(path):
+    # 'rec.jsonl.gz' -> ('rec', '.jsonl.gz'); segments are 'rec.1.jsonl.gz', 'rec.2.jsonl.gz', ...
+    directory, name = os.path.split(path)
+    stem, dot, ext = name.partition('.')
+    return os.path.join(directory, stem), dot + ext
+
+
+def segment_paths(path):
+    """The recording at `path` plus the segments later runs added next to it."""
+    stem, ext = _split_segment(path)
+    directory = os.path.dirname(stem) or '.'
+    pattern = re.compile(re.escape(os.path.basename(stem)) + r'\.(\d+)' + re.escape(ext) + '$')
+    numbered = []
+    if os.path.isdir(directory):
+        for name in os.listdir(directory):
+            m = pattern.match(name)
+            if m:
+                numbered.append((int(m.group(1)), os.path.join(os.path.dirname(stem), name)))
+    paths = [path] if os.path.exists(path) else []
+    return paths + [p for _, p in sorted(numbered)]
+
+
+def _new_segment(path):
+    if not os.path.exists(path):
+        return path
+    stem, ext = _split_segment(path)
+    n = 1
+    while os.path.exists(f"{stem}.{n}{ext}"):
+        n += 1
+    return f"{stem}.{n}{ext}"
+
+
+class RecordingConnector:
+    """
+    Wraps an IQConnector / ConnectorPool and writes every call, its result and
+    timestamps to a gzip-compressed JSON-lines file. Each run gets its own
+    file: if `path` exists the run goes to the next free segment
+    (rec.jsonl.gz -> rec.1.jsonl.gz, ...), so a run that died mid-write can't
+    corrupt the gzip stream of the next one. load_events() reads them all.
+    """
+
+    def __init__(self, inner, path):
+        self.inner = inner
+        self.path = _new_segment(path)
+        self.lock = threading.Lock()
+        self.file = gzip.open(self.path, 'wt', encoding='utf-8')
+
+    @property
+    def Iq(self):
+        return self.inner.Iq
+
+    def _record(self, method, *args, **kwargs):
+        started = _time.time()
+        error = None
+        result = None
+        try:
+            result = getattr(self.inner, method)(*args, **kwargs)
+            return result
+        except Exception as e:
+            error = repr(e)
+            raise
+        finally:
+            event = {
+                't': started,
+                'd': round(_time.time() - started, 6),
+                'm': method,
+                'a': _encode(normalize_args(method, args, kwargs)),
+                'r': _encode(result),
+                'e': error,
+            }
+            with self.lock:
+                self.file.write(json.dumps(event) + '\n')
+                self.file.flush()
+
+    def connect(self):
+        return self._record('connect')
+
+    def get_all_assets(self):
+        return self._record('get_all_assets')
+
+    def get_payouts(self):
+        return self._record('get_payouts')
+
+    def get_balance(self):
+        return self._record('get_balance')
+
+    def get_server_time(self):
+        return self.inner.get_server_time()
+
+    def get_candles(self, asset, timeframe_seconds=60, count=100):
+        return self._record('get_candles', asset, timeframe_seconds, count)
+
+    def detect_asset_type(self, asset):
+        return self._record('detect_asset_type', asset)
+
+    def buy_asset(self, asset, amount, direction, expiration_minutes=1):
+        return self._record('buy_asset', asset, amount, direction, expiration_minutes)
+
+    def check_trade_result(self, response):
+        return self._record('check_trade_result', response)
+
+    def get_position_open_time(self, response):
+        return self._record('get_position_open_time', response)
+
+    def start_stream(self, asset, size=1, maxdict=300):
+        return self._record('start_stream', asset, size, maxdict)
+
+    def stop_stream(self, asset, size=1):
+        return self._record('stop_stream', asset, size)
+
+    def get_realtime_candles(self, asset, size=1, since=0):
+        return self._record('get_realtime_candles', asset, size, since)
+
+    def close(self):
+        with self.lock:
+            if not self.file.closed:
+                self.file.close()
+
+
+def load_events(path):
+    """All events of a recording and its segments, in time order."""
+    events = []
+    for segment in segment_paths(path):
+        with gzip.open(segment, 'rt', encoding='utf-8') as f:
+            try:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        events.append(json.loads(line))
+            except (EOFError, OSError, zlib.error, json.JSONDecodeError) as e:
+                # run interrupted mid-write: keep everything before the torn tail
+                print(f"⚠️ {segment}: recording truncated ({e}), replaying the events before it")
+    events.sort(key=lambda e: e['t'])
+    return events
+
+
+class ReplayClock:
+    """
+    Virtual time for replays: starts at the first recorded timestamp and runs
+    `speed` times faster than wall-clock time. Exposes the subset of the `time`
+    module the bot uses so it can stand in for it (see install()).
+    """
+
+    def __init__(self, start, speed=1.0):
+        self.start = float(start)
+        self.speed = float(speed)
+        self.real_start = _time.monotonic()
+
+    def time(self):
+        return self.start + (_time.monotonic() - self.real_start) * self.speed
+
+    def monotonic(self):
+        return self.time()
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            _time.sleep(seconds / self.speed)
+
+    def install(self, *modules):
+        for module in modules:
+            module.time = self
+
+
+class _ReplayIq:
+    def __init__(self, replay):
+        self.replay = replay
+
+    def check_connect(self):
+        return True
+
+    def get_balance(self):
+        return self.replay.get_balance()
+
+
+class ReplayConnector:
+    """
+    Serves recorded traffic back through the IQConnector interface.
+    Reads (candles, open-time, balance, ...) return the latest response recorded
+    at or before the current virtual time for the same arguments (unrecorded
+    arguments get None / no candles); orders and trade results are returned in
+    recorded order. Orders are matched by asset and direction, trade results by
+    the order response they were checked for; with no match the call gets None.
+    Realtime streams replay the latest recorded stream snapshot for the asset,
+    filtered by `since`; subscribing is a no-op. Recorded errors are re-raised.
+    """
+
+    def __init__(self, path, speed=1.0):
+        self.events = load_events(path)
+        if not self.events:
+            raise ValueError(f"No recorded events in {path}")
+        self.clock = ReplayClock(self.events[0]['t'], speed)
+        self.end = self.events[-1]['t']
+        self.Iq = _ReplayIq(self)
+        self.asset_type_cache = {}
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.has_stream = any(e['m'] == 'get_realtime_candles' for e in self.events)
+
+        self.by_key = {}
+        self.queues = {method: [] for method in SEQUENTIAL}
+        for event in self.events:
+            if event['m'] in SEQUENTIAL:
+                self.queues[event['m']].append(event)
+            else:
+                key = _lookup_key(event['m'], _decode(event['a']))
+                self.by_key.setdefault(key, ([], []))
+                self.by_key[key][0].append(event['t'])
+                self.by_key[key][1].append(event)
+
+    def finished(self):
+        return self.clock.time() > self.end
+
+    def _respond(self, event):
+        if event is None:
+            return None
+        if event['e']:
+            raise RuntimeError(f"replayed error: {event['e']}")
+        return _decode(event['r'])
+
+    def _at_time(self, times, events):
+        idx = bisect.bisect_right(times, self.clock.time()) - 1
+        return events[max(idx, 0)]
+
+    def _read(self, method, *args, **kwargs):
+        with self.lock:
+            self.calls += 1
+            key = _lookup_key(method, normalize_args(method, args, kwargs))
+            event = self._at_time(*self.by_key[key]) if key in self.by_key else None
+        if event is None and method == 'get_candles':
+            return []
+        return self._respond(event)
+
+    def _next(self, method, match):
+        with self.lock:
+            self.calls += 1
+            queue = self.queues[method]
+            event = next((i for i, e in enumerate(queue) if match(e)), None)
+            event = queue.pop(event) if event is not None else None
+        return self._respond(event)
+
+    def connect(self):
+        return True
+
+    def get_all_assets(self):
+        return self._read('get_all_assets') or []
+
+    def get_payouts(self):
+        return self._read('get_payouts') or {}
+
+    def get_balance(self):
+        return self._read('get_balance')
+
+    def get_server_time(self):
+        return self.clock.time()
+
+    def get_candles(self, asset, timeframe_seconds=60, count=100):
+        return self._read('get_candles', asset, timeframe_seconds, count)
+
+    def detect_asset_type(self, asset):
+        return self._read('detect_asset_type', asset)
+
+    def buy_asset(self, asset, amount, direction, expiration_minutes=1):
+        return self._next('buy_asset', lambda e: e['a'].get('asset') == asset
+                          and e['a'].get('direction') == direction)
+
+    def check_trade_result(self, response):
+        response = _encode(response)
+        return self._next('check_trade_result', lambda e: e['a'].get('response') == response)
+
+    def get_position_open_time(self, response):
+        return self._read('get_position_open_time', response)
+
+    def start_stream(self, asset, size=1, maxdict=300):
+        return None
+
+    def stop_stream(self, asset, size=1):
+        return None
+
+    def get_realtime_candles(self, asset, size=1, since=0):
+        candles = self._read('get_realtime_candles', asset, size) or []
+        return [c for c in candles if c['ts'] >= since]
@@ -0,0 +1,101 @@
+# scheduler.py - volatility/priority-aware asset scheduling for the scan loop
+import time
+
+import numpy as np
+
+
+class AssetScheduler:
+    """
+    Decides which assets to scan on each cycle.
+    Every analysed asset gets a priority in [0, 1] built from:
+     - recent volatility (relative to the other scanned assets)
+     - proximity of indicators to their trigger thresholds
+       (RSI near oversold/overbought, EMA spread near crossover, MACD histogram near zero)
+     - broker payout
+    High-priority assets are rescanned every cycle (min_interval), quiet ones up to
+    max_interval seconds apart.
+    """
+
+    def __init__(self, assets, params, min_interval=5, max_interval=60,
+                 weights=None, default_payout=0.80):
+        self.params = params
+        self.min_interval = float(min_interval)
+        self.max_interval = float(max(max_interval, min_interval))
+        self.weights = weights or {'volatility': 0.3, 'proximity': 0.5, 'payout': 0.2}
+        self.default_payout = default_payout
+        self.payouts = {}
+        self.priority = {}
+        self.volatility = {}
+        self.next_due = {}
+        self.set_assets(assets)
+
+    def set_assets(self, assets):
+        self.assets = list(dict.fromkeys(assets))
+        for asset in self.assets:
+            self.next_due.setdefault(asset, 0.0)
+        # forget removed assets: their volatility would still skew the median
+        current = set(self.assets)
+        for table in (self.volatility, self.priority, self.next_due):
+            for asset in [a for a in table if a not in current]:
+                del table[asset]
+
+    def set_payouts(self, payouts):
+        self.payouts.update(payouts or {})
+
+    def due(self, now=None):
+        """Assets whose next scan time has passed, highest priority first."""
+        now = time.time() if now is None else now
+        ready = [a for a in self.assets if self.next_due.get(a, 0.0) <= now]
+        return sorted(ready, key=lambda a: self.priority.get(a, 1.0), reverse=True)
+
+    def _proximity(self, close, analysis):
+        p = self.params
+        returns = np.diff(close[-21:])
+        sigma = float(np.std(returns)) or 1e-9
+
+        rsi = analysis.get('rsi')
+        if rsi is None or np.isnan(rsi):
+            rsi_prox = 0.0
+        else:
+            gap = max(0.0, min(rsi - p['rsi_oversold'], p['rsi_overbought'] - rsi))
+            rsi_prox = 1.0 - min(gap / 20.0, 1.0)
+
+        spread = abs(analysis.get('ema10', 0) - analysis.get('ema20', 0))
+        ema_prox = 1.0 - min(spread / sigma, 1.0)
+
+        macd_prox = 1.0 - min(abs(analysis.get('macd_hist', 0)) / sigma, 1.0)
+
+        return (rsi_prox + ema_prox + macd_prox) / 3, sigma / (abs(close[-1]) or 1.0)
+
+    def update(self, asset, df=None, analysis=None, now=None):
+        """Record the result of scanning `asset` and schedule its next scan."""
+        now = time.time() if now is None else now
+        if df is None or analysis is None or len(df) < 21:
+            # no data this time: retry at the midpoint cadence
+            self.next_due[asset] = now + (self.min_interval + self.max_interval) / 2
+            return self.priority.get(asset, 0.5)
+
+        close = df['close'].astype(float).to_numpy()
+        proximity, vol = self._proximity(close, analysis)
+        self.volatility[asset] = vol
+        median_vol = float(np.median(list(self.volatility.values()))) or 1e-9
+        vol_score = min(vol / median_vol / 2, 1.0)
+
+        payout = self.payouts.get(asset, self.default_payout)
+        payout_score = min(max((payout - 0.60) / 0.30, 0.0), 1.0)
+
+        w = self.weights
+        priority = float(w['volatility'] * vol_score + w['proximity'] * proximity
+                    + w['payout'] * payout_score) / sum(w.values())
+        if analysis.get('bullish_score', 0) >= self.params['min_score'] or \
+                analysis.get('bearish_score', 0) >= self.params['min_score']:
+            priority = 1.0
+
+        self.priority[asset] = priority
+        # priority 1.0 -> due again on the very next cycle, 0.0 -> after max_interval
+        self.next_due[asset] = now + (1.0 - priority) * (self.max_interval - self.min_interval)
+        return priority
+
+    def stats(self):
+        hot = sum(1 for a in self.assets if self.priority.get(a, 1.0) >= 0.75)
+        return {'assets': len(self.assets), 'hot': hot, 'scored': len(self.priority)}
@@ -0,0 +1,200 @@
+# shadow.py - paper-trade many strategy variants against the live candle feed
+import json
+
+import numpy as np
+
+from ledger import PositionLedger
+from strategy import AdvancedStrategy, IndicatorStore
+
+
+class ShadowVariant:
+    """
+    One strategy configuration with its own virtual martingale ledger, run in
+    sessions under the live stop rules: a session ends when a chain reaches
+    max_losses (a ruin) or its profit reaches take_profit. No new paper trades
+    open until the session's pending ones settle, then the chains start over
+    from base_amount; P/L keeps accumulating across sessions.
+    """
+
+    def __init__(self, name, params, base_amount=1, martingale_multiplier=2.2, max_concurrent=3,
+                 max_losses=5, take_profit=50):
+        self.name = name
+        self.params = AdvancedStrategy(params).params
+        self.ledger = PositionLedger(base_amount, martingale_multiplier, max_concurrent, chain_mode='asset')
+        self.max_losses = int(max_losses)
+        self.take_profit = float(take_profit)
+        self.session_start = 0.0
+        self.stopped = None
+        self.ruins = 0
+        self.targets = 0
+        self.pending = []
+        self.signals = 0
+        self.wins = 0
+        self.losses = 0
+        self.void = 0
+        self.peak = 0.0
+        self.max_drawdown = 0.0
+
+    def settle(self, trade, exit_price):
+        pos, entry_price, _ = trade
+        if pos.direction == 'call':
+            result = 'win' if exit_price > entry_price else 'loss'
+        else:
+            result = 'win' if exit_price < entry_price else 'loss'
+        self.ledger.close_position(pos.id, result)
+        if result == 'win':
+            self.wins += 1
+        else:
+            self.losses += 1
+        profit = self.ledger.total_profit
+        self.peak = max(self.peak, profit)
+        self.max_drawdown = max(self.max_drawdown, self.peak - profit)
+        if self.stopped is None:
+            self.stopped, _ = self.should_stop_trading()
+            if self.stopped == 'ruin':
+                self.ruins += 1
+            elif self.stopped == 'target':
+                self.targets += 1
+
+    def should_stop_trading(self):
+        """Same rules as TradeManager.should_stop_trading, as ('ruin' | 'target' | None, reason)."""
+        if self.ledger.max_consecutive_losses() >= self.max_losses:
+            return 'ruin', f"Max losses ({self.max_losses}) reached"
+        if self.ledger.total_profit - self.session_start >= self.take_profit:
+            return 'target', f"Take profit target (${self.take_profit}) reached"
+        return None, None
+
+    def can_open(self):
+        """False while a stopped session still has trades pending; then starts the next session."""
+        if self.stopped is None:
+            return True
+        if self.pending:
+            return False
+        self.ledger.restore(self.ledger.total_profit, self.ledger.trade_count)
+        self.session_start = self.ledger.total_profit
+        self.stopped = None
+        return True
+
+    def stats(self):
+        trades = self.wins + self.losses
+        return {
+            'name': self.name,
+            'signals': self.signals,
+            'trades': trades,
+            'wins': self.wins,
+            'win_rate': self.wins / trades if trades else 0.0,
+            'profit': self.ledger.total_profit,
+            'max_drawdown': self.max_drawdown,
+            'consecutive_losses': self.ledger.max_consecutive_losses(),
+            'ruins': self.ruins,
+            'targets': self.targets,
+            'open': len(self.pending),
+            'void': self.void,
+        }
+
+
+class ShadowEvaluator:
+    """
+    Scores K variants on every candle window the live loop fetches. Indicator columns
+    come from an IndicatorStore (shared with the live strategy when passed in) and
+    pattern matches are looked up once per asset, so each extra variant only adds
+    its own scoring. Signals become paper trades
+    entered at the current price and settled on the close of the bar ending exactly at
+    the option's expiry (1-minute options expire on the next minute boundary, or the one
+    after if fewer than 30s remain). With a timeframe that does not divide 60s, expiries
+    falling inside a bar have no such close: those signals are counted as void, as are
+    trades whose settling bar is missing from the feed.
+    """
+
+    def __init__(self, variants, matcher=None, timeframe=60, expiry_minutes=1, indicators=None):
+        self.variants = list(variants)
+        self.matcher = matcher
+        self.indicators = indicators or IndicatorStore()
+        self.timeframe = int(timeframe)
+        self.expiry_minutes = int(expiry_minutes)
+
+    @classmethod
+    def from_file(cls, path, matcher=None, timeframe=60, base_amount=1,
+                  martingale_multiplier=2.2, max_concurrent=3, indicators=None,
+                  max_losses=5, take_profit=50):
+        """Load variants from JSON: {"name": {param overrides}, ...}."""
+        with open(path, 'r') as f:
+            config = json.load(f)
+        variants = [ShadowVariant(name, params, base_amount, martingale_multiplier, max_concurrent,
+                                  max_losses, take_profit)
+                    for name, params in config.items()]
+        return cls(variants, matcher, timeframe, indicators=indicators)
+
+    def expiry(self, now):
+        return (int(now + 30) // 60 + self.expiry_minutes) * 60
+
+    def _resolve(self, asset, ts, close):
+        for v in self.variants:
+            still_open = []
+            for trade in v.pending:
+                pos, _, exp = trade
+                if pos.asset != asset:
+                    still_open.append(trade)
+                    continue
+                # the bar ending exactly at expiry, once it has closed
+                start = exp - self.timeframe
+                idx = int(np.searchsorted(ts, start))
+                if idx == len(ts) or (ts[idx] == start and idx + 1 == len(ts)):
+                    still_open.append(trade)
+                elif ts[idx] == start:
+                    v.settle(trade, close[idx])
+                else:
+                    v.ledger.cancel_position(pos.id)
+                    v.void += 1
+            v.pending = still_open
+
+    def on_candles(self, asset, df, now):
+        if df is None or len(df) < 30:
+            return
+        ts = df['ts'].to_numpy(dtype=float)
+        cache = self.indicators.frame(asset, df)
+        self._resolve(asset, ts, cache.close)
+
+        exp = self.expiry(now)
+        matches = []
+        if self.matcher is not None:
+            matches = self.matcher.find_similar_patterns(asset, cache.close[-20:].tolist())
+
+        for v in self.variants:
+            p = v.params
+            _, bull, bear = AdvancedStrategy.score_bars(cache, p)
+            bull, bear = bull[-1], bear[-1]
+            if matches and matches[0]['similarity'] > p['similarity_threshold']:
+                if matches[0]['result'] == 'call':
+                    bull += p['w_history']
+                elif matches[0]['result'] == 'put':
+                    bear += p['w_history']
+
+            if bull >= p['min_score'] and bull > bear:
+                direction = 'call'
+            elif bear >= p['min_score'] and bear > bull:
+                direction = 'put'
+            else:
+                continue
+            v.signals += 1
+            if exp % self.timeframe:
+                v.void += 1
+                continue
+            if not v.can_open():
+                continue
+            pos = v.ledger.open_position(asset, direction)
+            if pos is not None:
+                v.pending.append((pos, float(cache.close[-1]), exp))
+
+    def memory_bytes(self):
+        return sum(v.ledger.memory_bytes() + 64 * len(v.pending) for v in self.variants)
+
+    def report(self):
+        return sorted((v.stats() for v in self.variants), key=lambda s: s['profit'], reverse=True)
+
+    def print_report(self):
+        print(f"🧪 Shadow Variants ({len(self.variants)}):")
+        for s in self.report():
+            print(f"   {s['name']:16} WinRate: {s['win_rate']*100:5.1f}% | Trades: {s['trades']:4} | "
+                  f"P/L: {s['profit']:8.2f} | MaxDD: {s['max_drawdown']:7.2f} | "
+                  f"Ruins: {s['ruins']:3} | TP: {s['targets']:3} | Open: {s['open']}")
@@ -1,12 +1,48 @@
 import pandas as pd
 import numpy as np
-from collections import deque
+from collections import OrderedDict
+import sys
 import hashlib
+import threading
+
+class _PatternRing:
+    """Fixed-size ring of normalized trade patterns (float32 rows) and int8 labels."""
+    __slots__ = ('patterns', 'labels', 'count', 'head')
+
+    def __init__(self, capacity, window):
+        self.patterns = np.zeros((capacity, window), dtype=np.float32)
+        self.labels = np.zeros(capacity, dtype=np.int8)
+        self.count = 0
+        self.head = 0
+
+    def append(self, pattern, label):
+        self.patterns[self.head] = pattern
+        self.labels[self.head] = label
+        self.head = (self.head + 1) % len(self.labels)
+        self.count = min(self.count + 1, len(self.labels))
+
+    def rows(self):
+        return self.patterns[:self.count], self.labels[:self.count]
+
+
+LABELS = {'call': 1, 'put': -1}
+
 
 class PatternMatcher:
-    def __init__(self, max_history=500):
+    """
+    Pattern history per asset: trade patterns added one by one (history, a ring
+    of max_history rows) plus bulk windows seeded from historical candles
+    (seeded). Both are float32 matrices of normalized windows with an int8
+    label each (+1 call / -1 put), searched with one vectorized pass.
+    """
+
+    SEED_CHUNK = 1 << 18
+
+    def __init__(self, max_history=500, max_seeded=50000):
         self.history = {}
         self.max_history = max_history
+        self.seeded = {}
+        self.max_seeded = max_seeded
     
     def normalize_pattern(self, candles):
         if len(candles) < 2:
@@ -22,88 +58,203 @@ class PatternMatcher:
         return hashlib.md5(pattern_str.encode()).hexdigest()[:8]
     
     def add_pattern(self, asset, candles, result):
-        if asset not in self.history:
-            self.history[asset] = deque(maxlen=self.max_history)
-        
         normalized = self.normalize_pattern(candles)
-        if normalized:
-            self.history[asset].append({
-                'pattern': normalized,
-                'result': result,
-                'hash': self.pattern_hash(normalized)
-            })
+        if not normalized or result not in LABELS:
+            return
+        ring = self.history.get(asset)
+        if ring is None:
+            ring = self.history[asset] = _PatternRing(self.max_history, len(normalized))
+        # the ring holds one window length (the 20-candle analysis window)
+        if ring.patterns.shape[1] == len(normalized):
+            ring.append(normalized, LABELS[result])
     
+    @classmethod
+    def normalize_windows(cls, closes, window=20):
+        """
+        Min-max normalize every `window`-long slice of `closes` at once over a
+        sliding-window view. Returns a float32 matrix,
+        one row per window; flat windows become 0.5 like normalize_pattern().
+        """
+        closes = np.asarray(closes, dtype=np.float64)
+        if len(closes) < window:
+            return np.empty((0, window), dtype=np.float32)
+        windows = np.lib.stride_tricks.sliding_window_view(closes, window)
+        out = np.empty(windows.shape, dtype=np.float32)
+        for start in range(0, len(windows), cls.SEED_CHUNK):
+            chunk = windows[start:start + cls.SEED_CHUNK]
+            lo = chunk.min(axis=1, keepdims=True)
+            span = chunk.max(axis=1, keepdims=True) - lo
+            flat = span[:, 0] == 0
+            norm = (chunk - lo) / np.where(span == 0, 1.0, span)
+            norm[flat] = 0.5
+            out[start:start + len(chunk)] = norm
+        return out
+
+    def seed(self, asset, closes, window=20):
+        """
+        Bootstrap `asset` history from historical closes: every window ending at
+        bar i is labelled with the realized direction of bar i+1 (call if the
+        next close is higher, put if lower, unchanged bars are skipped).
+        Keeps the most recent max_seeded windows. Returns the number added.
+        """
+        closes = np.asarray(closes, dtype=np.float64)
+        n = len(closes) - window
+        if n <= 0:
+            return 0
+        move = np.sign(closes[window:] - closes[window - 1:-1]).astype(np.int8)
+        keep = np.flatnonzero(move != 0)[-self.max_seeded:]
+        if len(keep) == 0:
+            return 0
+        first = int(keep[0])
+        # only windows from the oldest kept one up to the last labelled one
+        patterns = self.normalize_windows(closes[first:-1], window)
+        patterns, labels = patterns[keep - first], move[keep]
+
+        if asset in self.seeded and self.seeded[asset][0].shape[1] == window:
+            old_patterns, old_labels = self.seeded[asset]
+            patterns = np.concatenate([old_patterns, patterns])[-self.max_seeded:]
+            labels = np.concatenate([old_labels, labels])[-self.max_seeded:]
+        self.seeded[asset] = (patterns, labels)
+        return len(keep)
+
+    @staticmethod
+    def _similar(patterns, labels, current, threshold, limit=5):
+        if len(labels) == 0 or patterns.shape[1] != len(current):
+            return []
+        diff = np.abs(patterns - current).mean(axis=1)
+        idx = np.flatnonzero(diff < threshold)
+        if len(idx) > limit:
+            idx = idx[np.argpartition(diff[idx], limit)[:limit]]
+        return [{'similarity': 1 - float(diff[i]), 'result': 'call' if labels[i] > 0 else 'put'}
+                for i in idx]
+
     def find_similar_patterns(self, asset, current_candles, threshold=0.15):
-        if asset not in self.history or len(self.history[asset]) == 0:
+        if asset not in self.history and asset not in self.seeded:
             return []
         
         current_norm = self.normalize_pattern(current_candles)
         if not current_norm:
             return []
+        current = np.asarray(current_norm, dtype=np.float32)
         
         matches = []
-        for hist in self.history[asset]:
-            if len(hist['pattern']) != len(current_norm):
-                continue
-            
-            diff = sum(abs(a - b) for a, b in zip(current_norm, hist['pattern'])) / len(current_norm)
-            if diff < threshold:
-                matches.append({
-                    'similarity': 1 - diff,
-                    'result': hist['result']
-                })
+        if asset in self.seeded:
+            matches += self._similar(*self.seeded[asset], current, threshold)
+        if asset in self.history:
+            matches += self._similar(*self.history[asset].rows(), current, threshold)
         
         return sorted(matches, key=lambda x: x['similarity'], reverse=True)[:5]
 
+    def memory_bytes(self):
+        total = sum(p.nbytes + l.nbytes for p, l in self.seeded.values())
+        return total + sum(r.patterns.nbytes + r.labels.nbytes for r in self.history.values())
+
+    def trim(self, max_bytes):
+        """Halve the largest seeded set (keeping its newest windows) until under max_bytes."""
+        while self.memory_bytes() > max_bytes and self.seeded:
+            asset = max(self.seeded, key=lambda a: len(self.seeded[a][1]))
+            patterns, labels = self.seeded[asset]
+            keep = len(labels) // 2
+            if keep < 1:
+                del self.seeded[asset]
+            else:
+                self.seeded[asset] = (patterns[-keep:].copy(), labels[-keep:].copy())
+
 
 class CandlePatterns:
+    """
+    Candlestick patterns.
+    The *_mask methods work on whole OHLC series (1-D) or batches of series
+    (2-D, bars along the last axis) and return a boolean flag for every bar
+    in one NumPy pass (analyze() gets them through the ('scan',) IndicatorCache
+    node). The is_* methods are scalar wrappers for checking a single candle.
+    """
+
+    @staticmethod
+    def _arrays(*series):
+        return [np.asarray(s, dtype=float) for s in series]
+
+    @staticmethod
+    def _previous(a):
+        prev = np.empty_like(a)
+        prev[..., 0] = np.nan
+        prev[..., 1:] = a[..., :-1]
+        return prev
+
+    @staticmethod
+    def hammer_mask(o, h, l, c):
+        o, h, l, c = CandlePatterns._arrays(o, h, l, c)
+        body = np.abs(c - o)
+        lower_shadow = np.minimum(o, c) - l
+        upper_shadow = h - np.maximum(o, c)
+        return (body != 0) & (lower_shadow > 2 * body) & (upper_shadow < body) & (c > o)
+
+    @staticmethod
+    def shooting_star_mask(o, h, l, c):
+        o, h, l, c = CandlePatterns._arrays(o, h, l, c)
+        body = np.abs(c - o)
+        lower_shadow = np.minimum(o, c) - l
+        upper_shadow = h - np.maximum(o, c)
+        return (body != 0) & (upper_shadow > 2 * body) & (lower_shadow < body) & (c < o)
+
+    @staticmethod
+    def _engulfing_bullish(prev_o, prev_c, o, c):
+        return (prev_c < prev_o) & (c > o) & (o < prev_c) & (c > prev_o)
+
+    @staticmethod
+    def _engulfing_bearish(prev_o, prev_c, o, c):
+        return (prev_c > prev_o) & (c < o) & (o > prev_c) & (c < prev_o)
+
+    @staticmethod
+    def engulfing_bullish_mask(o, c):
+        o, c = CandlePatterns._arrays(o, c)
+        prev_o, prev_c = CandlePatterns._previous(o), CandlePatterns._previous(c)
+        return CandlePatterns._engulfing_bullish(prev_o, prev_c, o, c)
+
+    @staticmethod
+    def engulfing_bearish_mask(o, c):
+        o, c = CandlePatterns._arrays(o, c)
+        prev_o, prev_c = CandlePatterns._previous(o), CandlePatterns._previous(c)
+        return CandlePatterns._engulfing_bearish(prev_o, prev_c, o, c)
+
+    @staticmethod
+    def doji_mask(o, h, l, c):
+        o, h, l, c = CandlePatterns._arrays(o, h, l, c)
+        body = np.abs(c - o)
+        total_range = h - l
+        ratio = np.divide(body, total_range, out=np.ones_like(body), where=total_range != 0)
+        return (total_range != 0) & (ratio < 0.1)
+
+    @staticmethod
+    def scan(o, h, l, c):
+        """All pattern masks for an OHLC series or batch of series."""
+        return {
+            'hammer': CandlePatterns.hammer_mask(o, h, l, c),
+            'shooting_star': CandlePatterns.shooting_star_mask(o, h, l, c),
+            'engulfing_bullish': CandlePatterns.engulfing_bullish_mask(o, c),
+            'engulfing_bearish': CandlePatterns.engulfing_bearish_mask(o, c),
+            'doji': CandlePatterns.doji_mask(o, h, l, c),
+        }
+
     @staticmethod
     def is_hammer(o, h, l, c):
-        body = abs(c - o)
-        lower_shadow = min(o, c) - l
-        upper_shadow = h - max(o, c)
-        
-        if body == 0:
-            return False
-        
-        return (lower_shadow > 2 * body and 
-                upper_shadow < body and 
-                c > o)
+        return bool(CandlePatterns.hammer_mask(o, h, l, c))
     
     @staticmethod
     def is_shooting_star(o, h, l, c):
-        body = abs(c - o)
-        lower_shadow = min(o, c) - l
-        upper_shadow = h - max(o, c)
-        
-        if body == 0:
-            return False
-        
-        return (upper_shadow > 2 * body and 
-                lower_shadow < body and 
-                c < o)
+        return bool(CandlePatterns.shooting_star_mask(o, h, l, c))
     
     @staticmethod
     def is_engulfing_bullish(prev_o, prev_c, o, c):
-        return (prev_c < prev_o and 
-                c > o and 
-                o < prev_c and 
-                c > prev_o)
+        return bool(CandlePatterns._engulfing_bullish(*CandlePatterns._arrays(prev_o, prev_c, o, c)))
     
     @staticmethod
     def is_engulfing_bearish(prev_o, prev_c, o, c):
-        return (prev_c > prev_o and 
-                c < o and 
-                o > prev_c and 
-                c < prev_o)
+        return bool(CandlePatterns._engulfing_bearish(*CandlePatterns._arrays(prev_o, prev_c, o, c)))
     
     @staticmethod
     def is_doji(o, h, l, c):
-        body = abs(c - o)
-        total_range = h - l
-        if total_range == 0:
-            return False
-        return body / total_range < 0.1
+        return bool(CandlePatterns.doji_mask(o, h, l, c))
 
 
 class Indicators:
@@ -135,109 +286,356 @@ class Indicators:
         return recent_lows.iloc[-1], recent_highs.iloc[-1]
 
 
-class AdvancedStrategy:
+class IndicatorCache:
+    """
+    Indicator DAG over one OHLC window.
+
+    Nodes are tuples (op, *args) whose arguments may themselves be nodes, with
+    'open', 'high', 'low' and 'close' as leaves, e.g. ('ema', 'close', 10),
+    ('rolling_max', 'high', 20) or ('ema', ('macd', 'close', 12, 26), 9).
+    node() computes each node once and resolves its inputs through the same
+    memo, so MACD reuses the EMA columns and every strategy, variant or
+    parameter set scored against the window shares them.
+    """
+
+    def __init__(self, df):
+        self.open = df['open'].to_numpy(dtype=float)
+        self.high = df['high'].to_numpy(dtype=float)
+        self.low = df['low'].to_numpy(dtype=float)
+        self.close = df['close'].to_numpy(dtype=float)
+        self.columns = {'open': self.open, 'high': self.high, 'low': self.low, 'close': self.close}
+
+    @classmethod
+    def from_columns(cls, columns):
+        """Cache over already computed columns (e.g. shared-memory views); must hold the OHLC leaves."""
+        cache = cls.__new__(cls)
+        cache.columns = dict(columns)
+        cache.open, cache.high, cache.low, cache.close = (cache.columns[k] for k in ('open', 'high', 'low', 'close'))
+        return cache
+
+    def node(self, key):
+        col = self.columns.get(key)
+        if col is None:
+            op, *args = key
+            col = self.columns[key] = _NODE_OPS[op](self, *args)
+        return col
+
+    def memory_bytes(self):
+        total = 0
+        for col in self.columns.values():
+            if isinstance(col, dict):
+                total += sum(v.nbytes for v in col.values())
+            else:
+                total += col.nbytes
+        return total
+
+    def get(self, name, *periods):
+        """Shorthand for the nodes analyze() scores with."""
+        if name == 'support':
+            return self.node(('rolling_min', 'low', periods[0]))
+        if name == 'resistance':
+            return self.node(('rolling_max', 'high', periods[0]))
+        if name in ('bull_pattern', 'bear_pattern'):
+            return self.node((name,))
+        return self.node((name, 'close') + periods)
+
+    def warm(self, param_sets):
+        self.get('bull_pattern')
+        self.get('bear_pattern')
+        for p in param_sets:
+            self.get('ema', p['ema_fast'])
+            self.get('ema', p['ema_slow'])
+            self.get('rsi', p['rsi_period'])
+            self.get('macd_hist', p['macd_fast'], p['macd_slow'], p['macd_signal'])
+            self.get('support', p['sr_window'])
+            self.get('resistance', p['sr_window'])
+
+
+def _series(cache, src):
+    return pd.Series(cache.node(src))
+
+
+def _macd_hist(cache, src, fast, slow, signal):
+    macd = ('macd', src, fast, slow)
+    return cache.node(macd) - cache.node(('ema', macd, signal))
+
+
+def _pattern_flags(cache, *names):
+    scan = cache.node(('scan',))
+    return np.logical_or.reduce([scan[n] for n in names])
+
+
+_NODE_OPS = {
+    'ema': lambda c, src, n: Indicators.ema(_series(c, src), n).to_numpy(dtype=float),
+    'rsi': lambda c, src, n: Indicators.rsi(_series(c, src), n).to_numpy(dtype=float),
+    'macd': lambda c, src, fast, slow: c.node(('ema', src, fast)) - c.node(('ema', src, slow)),
+    'macd_hist': _macd_hist,
+    'rolling_max': lambda c, src, n: _series(c, src).rolling(n).max().to_numpy(dtype=float),
+    'rolling_min': lambda c, src, n: _series(c, src).rolling(n).min().to_numpy(dtype=float),
+    'scan': lambda c: CandlePatterns.scan(c.open, c.high, c.low, c.close),
+    'bull_pattern': lambda c: _pattern_flags(c, 'hammer', 'engulfing_bullish'),
+    'bear_pattern': lambda c: _pattern_flags(c, 'shooting_star', 'engulfing_bearish'),
+}
+
+
+def _crossed_up(a, b):
+    out = np.zeros(len(a), dtype=bool)
+    out[1:] = (a[1:] > b[1:]) & (a[:-1] <= b[:-1])
+    return out
+
+
+def _crossed_down(a, b):
+    out = np.zeros(len(a), dtype=bool)
+    out[1:] = (a[1:] < b[1:]) & (a[:-1] >= b[:-1])
+    return out
+
+
+class AnalysisCache:
+    """
+    Bounded LRU of analyze() results keyed by
+    (asset, timeframe, last candle ts, hash of the OHLC window).
+    """
+
+    def __init__(self, max_size=256):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def fingerprint(df):
+        window = np.ascontiguousarray(df[['open', 'high', 'low', 'close']].to_numpy(dtype=float))
+        digest = hashlib.blake2b(window.tobytes(), digest_size=16).hexdigest()
+        last_ts = df['ts'].iloc[-1] if 'ts' in df.columns else None
+        return (last_ts, digest)
+
+    @staticmethod
+    def make_key(df, asset, timeframe, fingerprint=None):
+        return (asset, timeframe) + (fingerprint or AnalysisCache.fingerprint(df))
+
+    def get(self, key):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                signal, analysis = self.entries[key]
+                return signal, dict(analysis) if analysis else analysis
+            self.misses += 1
+            return None
+
+    def put(self, key, result):
+        with self.lock:
+            self.entries[key] = result
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def memory_bytes(self):
+        with self.lock:
+            return sum(sys.getsizeof(analysis) + 32 * len(analysis) if analysis else 0
+                       for _, analysis in self.entries.values()) + 200 * len(self.entries)
+
+    def trim(self, max_bytes):
+        """Evict least recently used results until under max_bytes."""
+        while self.entries and self.memory_bytes() > max_bytes:
+            with self.lock:
+                for _ in range(max(len(self.entries) // 4, 1)):
+                    if self.entries:
+                        self.entries.popitem(last=False)
+
+    def invalidate(self, asset=None):
+        # asset=None drops everything (e.g. after a parameter change)
+        with self.lock:
+            if asset is None:
+                self.entries.clear()
+                return
+            for key in [k for k in self.entries if k[0] == asset]:
+                del self.entries[key]
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'size': len(self.entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0
+        }
+
+
+class IndicatorStore:
+    """
+    Latest IndicatorCache per asset, keyed by the OHLC window fingerprint
+    (AnalysisCache.fingerprint).
+    Every strategy or scorer asking for the same asset and bar gets the same
+    DAG, so each indicator node is computed once per asset per new bar.
+    """
+
     def __init__(self):
+        self.frames = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def frame(self, asset, df, fingerprint=None):
+        key = fingerprint or AnalysisCache.fingerprint(df)
+        with self.lock:
+            entry = self.frames.get(asset)
+            if entry is not None and entry[0] == key:
+                self.frames.move_to_end(asset)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        cache = IndicatorCache(df)
+        with self.lock:
+            self.frames[asset] = (key, cache)
+            self.frames.move_to_end(asset)
+        return cache
+
+    def drop(self, asset):
+        with self.lock:
+            self.frames.pop(asset, None)
+
+    def memory_bytes(self):
+        with self.lock:
+            return sum(cache.memory_bytes() for _, cache in self.frames.values())
+
+    def trim(self, max_bytes):
+        """Drop least recently used assets until under max_bytes."""
+        with self.lock:
+            sizes = OrderedDict((a, c.memory_bytes()) for a, (_, c) in self.frames.items())
+            total = sum(sizes.values())
+            for asset, size in sizes.items():
+                if total <= max_bytes:
+                    break
+                del self.frames[asset]
+                total -= size
+
+    def stats(self):
+        total = self.hits + self.misses
+        with self.lock:
+            nodes = sum(len(cache.columns) for _, cache in self.frames.values())
+        return {
+            'assets': len(self.frames),
+            'nodes': nodes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0
+        }
+
+
+class AdvancedStrategy:
+    # Thresholds, indicator periods and scoring weights used by analyze().
+    # Override any subset via AdvancedStrategy(params={...}).
+    DEFAULT_PARAMS = {
+        'ema_fast': 10,
+        'ema_slow': 20,
+        'rsi_period': 14,
+        'rsi_oversold': 30,
+        'rsi_overbought': 70,
+        'macd_fast': 12,
+        'macd_slow': 26,
+        'macd_signal': 9,
+        'sr_window': 20,
+        'sr_tolerance': 0.01,
+        'similarity_threshold': 0.85,
+        'min_score': 5,
+        'w_pattern': 2,
+        'w_crossover': 2,
+        'w_rsi': 1,
+        'w_macd': 2,
+        'w_trend': 1,
+        'w_sr': 1,
+        'w_history': 2,
+    }
+
+    def __init__(self, params=None, cache_size=256, indicators=None):
         self.pattern_matcher = PatternMatcher()
+        self.cache = AnalysisCache(cache_size)
+        # pass a shared IndicatorStore to let several strategies reuse indicator columns
+        self.indicators = indicators or IndicatorStore()
+        self.params = dict(self.DEFAULT_PARAMS)
+        if params:
+            self.set_params(params)
+    
+    PERIOD_PARAMS = ('ema_fast', 'ema_slow', 'rsi_period', 'macd_fast', 'macd_slow', 'macd_signal', 'sr_window')
+
+    def validate_params(self, params):
+        """
+        Coerce `params` to the types of DEFAULT_PARAMS and check them against the
+        current values. Returns the coerced overrides; raises ValueError without
+        changing anything if any value is unknown, mistyped or out of range.
+        """
+        unknown = set(params) - set(self.DEFAULT_PARAMS)
+        if unknown:
+            raise ValueError(f"Unknown strategy parameters: {', '.join(sorted(unknown))}")
+        coerced = {}
+        for name, value in params.items():
+            kind = type(self.DEFAULT_PARAMS[name])
+            try:
+                number = float(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"{name} must be a number, got {value!r}") from None
+            if isinstance(value, bool) or not np.isfinite(number) or (kind is int and not number.is_integer()):
+                raise ValueError(f"{name} must be {'an integer' if kind is int else 'a number'}, got {value!r}")
+            coerced[name] = kind(number)
+
+        p = dict(self.params, **coerced)
+        errors = [f"{name} must be >= 1" for name in self.PERIOD_PARAMS if p[name] < 1]
+        if p['ema_fast'] >= p['ema_slow']:
+            errors.append('ema_fast must be < ema_slow')
+        if p['macd_fast'] >= p['macd_slow']:
+            errors.append('macd_fast must be < macd_slow')
+        if not 0 <= p['rsi_oversold'] < p['rsi_overbought'] <= 100:
+            errors.append('need 0 <= rsi_oversold < rsi_overbought <= 100')
+        if not 0 <= p['similarity_threshold'] <= 1:
+            errors.append('similarity_threshold must be within [0, 1]')
+        if p['sr_tolerance'] < 0:
+            errors.append('sr_tolerance must be >= 0')
+        if errors:
+            raise ValueError('; '.join(errors))
+        return coerced
+
+    def set_params(self, params):
+        """Update parameters in place (shared references see the change) and drop cached analyses."""
+        self.params.update(self.validate_params(params))
+        self.cache.invalidate()
     
-    def analyze(self, df, asset=None):
+    def analyze(self, df, asset=None, timeframe=None):
         if df.empty or len(df) < 30:
             return 'hold', None
         
-        df = df.copy().reset_index(drop=True)
-        
-        close = df['close'].astype(float)
-        high = df['high'].astype(float)
-        low = df['low'].astype(float)
-        open_price = df['open'].astype(float)
-        
-        ema10 = Indicators.ema(close, 10)
-        ema20 = Indicators.ema(close, 20)
-        rsi14 = Indicators.rsi(close, 14)
-        macd_line, signal_line, histogram = Indicators.macd(close)
-        
-        support, resistance = Indicators.support_resistance(high, low, 20)
-        
-        last_close = close.iloc[-1]
-        last_open = open_price.iloc[-1]
-        last_high = high.iloc[-1]
-        last_low = low.iloc[-1]
-        
-        prev_close = close.iloc[-2]
-        prev_open = open_price.iloc[-2]
-        
-        hammer = CandlePatterns.is_hammer(last_open, last_high, last_low, last_close)
-        shooting_star = CandlePatterns.is_shooting_star(last_open, last_high, last_low, last_close)
-        bullish_engulfing = CandlePatterns.is_engulfing_bullish(prev_open, prev_close, last_open, last_close)
-        bearish_engulfing = CandlePatterns.is_engulfing_bearish(prev_open, prev_close, last_open, last_close)
-        
-        ema_crossover_bullish = ema10.iloc[-1] > ema20.iloc[-1] and ema10.iloc[-2] <= ema20.iloc[-2]
-        ema_crossover_bearish = ema10.iloc[-1] < ema20.iloc[-1] and ema10.iloc[-2] >= ema20.iloc[-2]
+        fingerprint = AnalysisCache.fingerprint(df)
+        key = AnalysisCache.make_key(df, asset, timeframe, fingerprint)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
         
-        rsi_oversold = rsi14.iloc[-1] < 30
-        rsi_overbought = rsi14.iloc[-1] > 70
-        
-        macd_bullish = histogram.iloc[-1] > 0 and histogram.iloc[-2] <= 0
-        macd_bearish = histogram.iloc[-1] < 0 and histogram.iloc[-2] >= 0
+        result = self._analyze(df, asset, fingerprint)
+        self.cache.put(key, result)
+        return result
+    
+    def _analyze(self, df, asset=None, fingerprint=None):
+        p = self.params
+        cache = self.indicators.frame(asset, df, fingerprint)
+        _, bull, bear = self.score_bars(cache, p)
+        bullish_score = bull[-1].item()
+        bearish_score = bear[-1].item()
         
-        pattern_closes = close.tail(20).tolist()
-        similar_patterns = []
         if asset:
-            similar_patterns = self.pattern_matcher.find_similar_patterns(asset, pattern_closes)
-        
-        signal = 'hold'
-        confidence = 0
-        
-        bullish_score = 0
-        bearish_score = 0
-        
-        if hammer or bullish_engulfing:
-            bullish_score += 2
-        if ema_crossover_bullish:
-            bullish_score += 2
-        if rsi_oversold:
-            bullish_score += 1
-        if macd_bullish:
-            bullish_score += 2
-        if last_close > ema20.iloc[-1]:
-            bullish_score += 1
-        if last_close <= support * 1.01:
-            bullish_score += 1
-        
-        if shooting_star or bearish_engulfing:
-            bearish_score += 2
-        if ema_crossover_bearish:
-            bearish_score += 2
-        if rsi_overbought:
-            bearish_score += 1
-        if macd_bearish:
-            bearish_score += 2
-        if last_close < ema20.iloc[-1]:
-            bearish_score += 1
-        if last_close >= resistance * 0.99:
-            bearish_score += 1
-        
-        if similar_patterns:
-            top_match = similar_patterns[0]
-            if top_match['similarity'] > 0.85:
-                if top_match['result'] == 'call':
-                    bullish_score += 2
-                elif top_match['result'] == 'put':
-                    bearish_score += 2
+            bull_bonus, bear_bonus = self._pattern_bonus(asset, cache.close[-20:].tolist())
+            bullish_score += bull_bonus
+            bearish_score += bear_bonus
         
-        if bullish_score >= 5 and bullish_score > bearish_score:
-            signal = 'call'
-            confidence = min(bullish_score / 10.0, 1.0)
-        elif bearish_score >= 5 and bearish_score > bullish_score:
-            signal = 'put'
-            confidence = min(bearish_score / 10.0, 1.0)
+        signal, confidence = self._decide(bullish_score, bearish_score)
         
         analysis = {
-            'ema10': ema10.iloc[-1],
-            'ema20': ema20.iloc[-1],
-            'rsi': rsi14.iloc[-1],
-            'macd_hist': histogram.iloc[-1],
-            'support': support,
-            'resistance': resistance,
+            'ema10': cache.get('ema', p['ema_fast'])[-1],
+            'ema20': cache.get('ema', p['ema_slow'])[-1],
+            'rsi': cache.get('rsi', p['rsi_period'])[-1],
+            'macd_hist': cache.get('macd_hist', p['macd_fast'], p['macd_slow'], p['macd_signal'])[-1],
+            'support': cache.get('support', p['sr_window'])[-1],
+            'resistance': cache.get('resistance', p['sr_window'])[-1],
             'bullish_score': bullish_score,
             'bearish_score': bearish_score,
             'confidence': confidence
@@ -245,5 +643,81 @@ class AdvancedStrategy:
         
         return signal, analysis
     
+    @staticmethod
+    def score_bars(cache, p):
+        """
+        Vectorized equivalent of the analyze() scoring for every bar of an
+        IndicatorCache (without the pattern-history bonus).
+        Returns (signal, bullish_score, bearish_score) arrays; signal is 1 / -1 / 0.
+        """
+        close = cache.close
+        ema_f = cache.get('ema', p['ema_fast'])
+        ema_s = cache.get('ema', p['ema_slow'])
+        rsi = cache.get('rsi', p['rsi_period'])
+        hist = cache.get('macd_hist', p['macd_fast'], p['macd_slow'], p['macd_signal'])
+        support = cache.get('support', p['sr_window'])
+        resistance = cache.get('resistance', p['sr_window'])
+        zeros = np.zeros_like(hist)
+
+        with np.errstate(invalid='ignore'):
+            bull = (p['w_pattern'] * cache.get('bull_pattern')
+                    + p['w_crossover'] * _crossed_up(ema_f, ema_s)
+                    + p['w_rsi'] * (rsi < p['rsi_oversold'])
+                    + p['w_macd'] * _crossed_up(hist, zeros)
+                    + p['w_trend'] * (close > ema_s)
+                    + p['w_sr'] * (close <= support * (1 + p['sr_tolerance'])))
+            bear = (p['w_pattern'] * cache.get('bear_pattern')
+                    + p['w_crossover'] * _crossed_down(ema_f, ema_s)
+                    + p['w_rsi'] * (rsi > p['rsi_overbought'])
+                    + p['w_macd'] * _crossed_down(hist, zeros)
+                    + p['w_trend'] * (close < ema_s)
+                    + p['w_sr'] * (close >= resistance * (1 - p['sr_tolerance'])))
+
+        signal = np.zeros(len(close), dtype=np.int8)
+        signal[(bull >= p['min_score']) & (bull > bear)] = 1
+        signal[(bear >= p['min_score']) & (bear > bull)] = -1
+        return signal, bull, bear
+    
+    def _pattern_bonus(self, asset, pattern_closes):
+        p = self.params
+        similar_patterns = self.pattern_matcher.find_similar_patterns(asset, pattern_closes)
+        if similar_patterns:
+            top_match = similar_patterns[0]
+            if top_match['similarity'] > p['similarity_threshold']:
+                if top_match['result'] == 'call':
+                    return p['w_history'], 0
+                elif top_match['result'] == 'put':
+                    return 0, p['w_history']
+        return 0, 0
+    
+    def _decide(self, bullish_score, bearish_score):
+        p = self.params
+        if bullish_score >= p['min_score'] and bullish_score > bearish_score:
+            return 'call', min(bullish_score / 10.0, 1.0)
+        elif bearish_score >= p['min_score'] and bearish_score > bullish_score:
+            return 'put', min(bearish_score / 10.0, 1.0)
+        return 'hold', 0
+    
+    def apply_pattern_history(self, asset, analysis, pattern_closes):
+        """
+        Finish an analysis computed without pattern history (asset=None, e.g. in a
+        worker process) by adding this strategy's pattern-match bonus for `asset`.
+        """
+        if not analysis:
+            return 'hold', analysis
+        analysis = dict(analysis)
+        bull_bonus, bear_bonus = self._pattern_bonus(asset, pattern_closes)
+        analysis['bullish_score'] += bull_bonus
+        analysis['bearish_score'] += bear_bonus
+        signal, analysis['confidence'] = self._decide(analysis['bullish_score'], analysis['bearish_score'])
+        return signal, analysis
+    
+    def seed_patterns(self, asset, closes, window=20):
+        added = self.pattern_matcher.seed(asset, closes, window)
+        self.cache.invalidate(asset)
+        return added
+    
     def update_pattern_result(self, asset, candles, result):
         self.pattern_matcher.add_pattern(asset, candles, result)
+        # cached scores for this asset may include a stale pattern-match bonus
+        self.cache.invalidate(asset)
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Parallel parameter sweep over AdvancedStrategy thresholds.
+
+Evaluates a grid (or a random sample of the grid) of strategy parameters
+against stored historical candles and ranks the configurations by win rate,
+P/L and drawdown.
+
+ - Indicator columns (EMA, RSI, MACD histogram, support/resistance) are
+   precomputed once per distinct period and reused by every parameter set
+   that shares that period.
+ - The precomputed columns are packed into one multiprocessing.shared_memory
+   block; worker processes attach to it once (pool initializer) and read them
+   as read-only views, so they are never copied per worker or per task.
+ - Each bar with a signal is treated as a 1-minute trade entered at the next
+   candle's open and settled at its close, with the fixed 0.80 payout used
+   by TradeManager and a flat stake of 1.
+
+Historical pattern matching (w_history / similarity_threshold) needs trade
+history and is not exercised by the sweep.
+
+Usage:
+    python sweep.py EURUSD-OTC.csv GBPUSD-OTC.csv --mode random --samples 500
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from offload import _attach
+from strategy import AdvancedStrategy, IndicatorCache
+
+PAYOUT = 0.80
+WARMUP = 30
+
+DEFAULT_GRID = {
+    'ema_fast': [5, 10, 15],
+    'ema_slow': [20, 30],
+    'rsi_period': [7, 14],
+    'rsi_oversold': [25, 30, 35],
+    'rsi_overbought': [65, 70, 75],
+    'macd_fast': [12],
+    'macd_slow': [26],
+    'macd_signal': [9],
+    'sr_window': [20],
+    'sr_tolerance': [0.005, 0.01],
+    'min_score': [4, 5, 6],
+}
+
+CANDLE_COLUMNS = ['ts', 'open', 'high', 'low', 'close', 'volume']
+
+
+def load_candles(path):
+    """Load candles stored as CSV or JSON (list of connector candle dicts)."""
+    if path.lower().endswith('.json'):
+        with open(path, 'r') as f:
+            df = pd.DataFrame(json.load(f))
+    else:
+        df = pd.read_csv(path)
+    for col in CANDLE_COLUMNS:
+        if col not in df.columns:
+            df[col] = 0 if col == 'volume' else None
+    df = df[CANDLE_COLUMNS].dropna(subset=['open', 'high', 'low', 'close'])
+    return df.sort_values('ts').drop_duplicates('ts').reset_index(drop=True)
+
+
+def _signals(cache, p):
+    signal = AdvancedStrategy.score_bars(cache, p)[0]
+    signal[:WARMUP - 1] = 0
+    return signal
+
+
+def trade_outcomes(cache, signal):
+    """Per-trade P/L for signals on bar i, settled on bar i+1 (flat stake 1)."""
+    sig = signal[:-1]
+    move = np.sign(cache.close[1:] - cache.open[1:])
+    taken = sig != 0
+    won = (sig[taken] == move[taken])
+    return np.where(won, PAYOUT, -1.0)
+
+
+def evaluate(caches, p):
+    pnl = np.concatenate([trade_outcomes(c, _signals(c, p)) for c in caches]) if caches else np.empty(0)
+    trades = len(pnl)
+    wins = int((pnl > 0).sum())
+    equity = np.cumsum(pnl)
+    drawdown = float((np.maximum.accumulate(np.r_[0.0, equity]) - np.r_[0.0, equity]).max()) if trades else 0.0
+    return {
+        'trades': trades,
+        'wins': wins,
+        'win_rate': wins / trades if trades else 0.0,
+        'profit': float(equity[-1]) if trades else 0.0,
+        'max_drawdown': drawdown,
+    }
+
+
+def _view(shm, dtype, offset, length):
+    return np.ndarray((length,), dtype=np.dtype(dtype), buffer=shm.buf, offset=offset)
+
+
+class SharedColumns:
+    """
+    The array columns of several warmed IndicatorCaches packed into one
+    shared-memory block. `layout` lists (node key, dtype, offset, length) per
+    cache; workers rebuild the caches from it as read-only views of the block.
+    """
+
+    def __init__(self, caches):
+        self.layout, size = [], 0
+        for cache in caches:
+            entries = []
+            for key, col in cache.columns.items():
+                if isinstance(col, np.ndarray):
+                    entries.append((key, col.dtype.str, size, len(col)))
+                    size += -(-col.nbytes // 8) * 8
+            self.layout.append(entries)
+        self.shm = shared_memory.SharedMemory(create=True, size=max(size, 8))
+        for cache, entries in zip(caches, self.layout):
+            for key, dtype, offset, length in entries:
+                _view(self.shm, dtype, offset, length)[:] = cache.columns[key]
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @staticmethod
+    def caches(shm, layout):
+        caches = []
+        for entries in layout:
+            columns = {}
+            for key, dtype, offset, length in entries:
+                col = columns[key] = _view(shm, dtype, offset, length)
+                col.flags.writeable = False
+            caches.append(IndicatorCache.from_columns(columns))
+        return caches
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+# --- worker process state (set once per worker by the pool initializer) ---
+_SHM = None
+_CACHES = None
+
+
+def _init_worker(name, layout):
+    global _SHM, _CACHES
+    _SHM = _attach(name)
+    _CACHES = SharedColumns.caches(_SHM, layout)
+
+
+def _evaluate_task(p):
+    return p, evaluate(_CACHES, p)
+
+
+def build_param_sets(grid, mode='grid', samples=200, seed=None):
+    base = AdvancedStrategy.DEFAULT_PARAMS
+    keys = sorted(grid)
+    if mode == 'grid':
+        combos = [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+    else:
+        rng = random.Random(seed)
+        combos = [{k: rng.choice(grid[k]) for k in keys} for _ in range(samples)]
+
+    param_sets, seen = [], set()
+    for combo in combos:
+        p = dict(base)
+        p.update(combo)
+        if p['ema_fast'] >= p['ema_slow'] or p['macd_fast'] >= p['macd_slow']:
+            continue
+        key = tuple(sorted(p.items()))
+        if key not in seen:
+            seen.add(key)
+            param_sets.append(p)
+    return param_sets
+
+
+def rank_results(results, min_trades=10):
+    eligible = [r for r in results if r[1]['trades'] >= min_trades]
+    return sorted(eligible, key=lambda r: (-r[1]['win_rate'], -r[1]['profit'], r[1]['max_drawdown']))
+
+
+def run_sweep(frames, param_sets, workers=None, min_trades=10):
+    caches = [IndicatorCache(df) for df in frames]
+    for cache in caches:
+        cache.warm(param_sets)
+
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1:
+        results = [(p, evaluate(caches, p)) for p in param_sets]
+    else:
+        chunksize = max(1, len(param_sets) // (workers * 4))
+        shared = SharedColumns(caches)
+        try:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(shared.name, shared.layout)) as pool:
+                results = list(pool.map(_evaluate_task, param_sets, chunksize=chunksize))
+        finally:
+            shared.close()
+    return rank_results(results, min_trades)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Parameter sweep over AdvancedStrategy thresholds')
+    parser.add_argument('files', nargs='+', help='Historical candle files (CSV or JSON), one per asset')
+    parser.add_argument('--mode', choices=['grid', 'random'], default='grid')
+    parser.add_argument('--samples', type=int, default=200, help='Configurations to draw in random mode')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--grid', help='JSON file overriding DEFAULT_GRID')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--min-trades', type=int, default=10)
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--out', help='Write full ranking to this CSV file')
+    args = parser.parse_args()
+
+    grid = dict(DEFAULT_GRID)
+    if args.grid:
+        with open(args.grid, 'r') as f:
+            grid.update(json.load(f))
+
+    frames = [load_candles(path) for path in args.files]
+    param_sets = build_param_sets(grid, args.mode, args.samples, args.seed)
+
+    print(f"🔬 Sweeping {len(param_sets)} configurations over {sum(len(df) for df in frames)} candles "
+          f"({len(frames)} assets)...")
+    start = time.time()
+    ranked = run_sweep(frames, param_sets, args.workers, args.min_trades)
+    print(f"✅ Done in {time.time() - start:.1f}s\n")
+
+    varying = [k for k in sorted(grid) if len(grid[k]) > 1]
+    for i, (p, m) in enumerate(ranked[:args.top], 1):
+        params = ', '.join(f"{k}={p[k]}" for k in varying)
+        print(f"#{i:<3} WinRate: {m['win_rate']*100:5.1f}% | Trades: {m['trades']:5} | "
+              f"P/L: {m['profit']:8.2f} | MaxDD: {m['max_drawdown']:7.2f} | {params}")
+
+    if args.out:
+        keys = sorted(AdvancedStrategy.DEFAULT_PARAMS)
+        with open(args.out, 'w', newline='') as f:
+            w = csv.writer(f)
+            w.writerow(['rank', 'trades', 'wins', 'win_rate', 'profit', 'max_drawdown'] + keys)
+            for i, (p, m) in enumerate(ranked, 1):
+                w.writerow([i, m['trades'], m['wins'], round(m['win_rate'], 4), round(m['profit'], 2),
+                            round(m['max_drawdown'], 2)] + [p[k] for k in keys])
+        print(f"\n💾 Ranking written to {args.out}")
+
+
+if __name__ == '__main__':
+    main()
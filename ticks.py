@@ -0,0 +1,220 @@
+# ticks.py - build OHLCV bars locally from the realtime quote stream
+import sys
+import time
+from collections import deque
+
+# candle sizes (seconds) IQ Option serves through get_candles, used to seed history
+BROKER_SIZES = (1, 5, 10, 15, 30, 60, 120, 300, 600, 900, 1800, 3600)
+
+# closed bars are kept as plain tuples in this field order (a fraction of a dict's size)
+BAR_FIELDS = ('ts', 'open', 'high', 'low', 'close', 'volume')
+
+
+class BarAggregator:
+    """
+    Aggregates ticks (or finer sub-bars such as 1s candles) into bars of `interval` seconds.
+    Bars start on multiples of the interval (ts // interval * interval, like the broker's
+    'from'). Re-sent updates of the same sub-bar (ingest_bar) replace its volume instead of
+    adding it, while every tick (ingest) adds its own; ticks older than the forming bar are
+    dropped. A seeded forming bar already carries the broker's volume up to `volume_cutoff`,
+    so sub-bars starting before that only update its prices. Empty intervals become flat
+    bars at the previous close when fill_gaps is set, so indicators keep a regular spacing.
+    Closed bars are stored as BAR_FIELDS tuples and handed out as candle dicts.
+    """
+
+    def __init__(self, interval, max_bars=500, fill_gaps=True):
+        self.interval = int(interval)
+        self.fill_gaps = fill_gaps
+        self.bars = deque(maxlen=max_bars)
+        self.current = None
+        self.last_sub = None
+        self.volume_cutoff = None
+        self.dropped = 0
+
+    def bar_start(self, ts):
+        return int(ts) // self.interval * self.interval
+
+    def seed(self, candles, now=None):
+        """
+        Load history (connector candle dicts) before streaming starts. The last candle
+        may be the broker's forming bar; `now` (broker time of the request) marks how
+        much of its volume is already counted.
+        """
+        for c in sorted(candles, key=lambda c: c['ts']):
+            if None in (c.get('open'), c.get('high'), c.get('low'), c.get('close')):
+                continue
+            self.ingest_bar(c['ts'], c['open'], c['high'], c['low'], c['close'], c.get('volume', 0) or 0)
+        self.last_sub = None
+        self.volume_cutoff = now
+
+    def ingest(self, ts, price, volume=0):
+        """Add one raw tick; ticks sharing a timestamp are separate trades. Returns the bars closed by it."""
+        return self._add(ts, price, price, price, price, volume, resend=False)
+
+    def ingest_bar(self, ts, o, h, l, c, volume=0):
+        """Add one sub-bar (a same-ts update replaces it). Returns the list of bars closed by it."""
+        return self._add(ts, o, h, l, c, volume, resend=True)
+
+    def _add(self, ts, o, h, l, c, volume, resend):
+        start = self.bar_start(ts)
+        closed = []
+
+        if self.current is not None and start < self.current['ts']:
+            self.dropped += 1
+            return closed
+
+        if self.current is not None and start > self.current['ts']:
+            closed.append(self._close_current())
+            if self.fill_gaps:
+                prev = closed[-1]['close']
+                for gap_ts in range(self.current_end, start, self.interval):
+                    flat = (gap_ts, prev, prev, prev, prev, 0)
+                    self.bars.append(flat)
+                    closed.append(dict(zip(BAR_FIELDS, flat)))
+            self.current = None
+
+        if self.current is None:
+            self.current = {'ts': start, 'open': o, 'high': h, 'low': l, 'close': c, 'volume': 0}
+            self.current_end = start + self.interval
+            self.last_sub = None
+            self.volume_cutoff = None
+
+        bar = self.current
+        bar['high'] = max(bar['high'], h)
+        bar['low'] = min(bar['low'], l)
+        bar['close'] = c
+        if self.volume_cutoff is not None and ts < self.volume_cutoff:
+            # already inside the seeded broker volume
+            return closed
+        if resend and self.last_sub is not None and self.last_sub[0] == ts:
+            bar['volume'] += volume - self.last_sub[1]
+        else:
+            bar['volume'] += volume
+        self.last_sub = (ts, volume) if resend else None
+        return closed
+
+    def _close_current(self):
+        self.bars.append(tuple(self.current[f] for f in BAR_FIELDS))
+        return dict(self.current)
+
+    def candles(self, count=100, include_forming=True):
+        forming = include_forming and self.current is not None
+        start = max(len(self.bars) - count + forming, 0)
+        bars = [dict(zip(BAR_FIELDS, self.bars[i])) for i in range(start, len(self.bars))]
+        if forming:
+            bars.append(dict(self.current))
+        return bars[-count:]
+
+    def memory_bytes(self):
+        if not self.bars:
+            return 0
+        # every bar tuple holds the same field types: size one and multiply
+        bar = self.bars[-1]
+        return len(self.bars) * (sys.getsizeof(bar) + sum(sys.getsizeof(v) for v in bar))
+
+
+class TickFeed:
+    """
+    Local bars for one timeframe across assets, fed from the connector's realtime
+    1-second candle stream. The first request for an asset seeds history with one
+    get_candles call (when the broker serves that size) and subscribes to the stream;
+    afterwards candles come from memory and only new stream entries are drained.
+    The stream keeps only the last `buffer` 1s candles: an asset left undrained for
+    longer is re-seeded from get_candles instead of bridging the lost entries with
+    flat bars. trim() never shortens an asset below `min_bars`, the history analysis needs,
+    since the bars are the only copy of it.
+    """
+
+    def __init__(self, conn, interval, max_bars=500, fill_gaps=True, buffer=300, min_bars=100):
+        self.conn = conn
+        self.interval = int(interval)
+        self.max_bars = max_bars
+        self.fill_gaps = fill_gaps
+        self.buffer = int(buffer)
+        self.min_bars = int(min_bars)
+        self.aggregators = {}
+        self.last_seen = {}
+        self.reseeds = 0
+
+    def _seed(self, asset, count):
+        agg = BarAggregator(self.interval, self.max_bars, self.fill_gaps)
+        if self.interval in BROKER_SIZES:
+            now = self._server_time()
+            agg.seed(self.conn.get_candles(asset, timeframe_seconds=self.interval, count=count), now)
+        self.aggregators[asset] = agg
+        self.last_seen[asset] = 0
+        return agg
+
+    def _start(self, asset, count):
+        agg = self._seed(asset, count)
+        self.conn.start_stream(asset, 1, self.buffer)
+        return agg
+
+    def _overrun(self, asset):
+        # the stream dropped entries newer than the last one drained
+        since = self.last_seen[asset]
+        return since > 0 and self._server_time() - since >= self.buffer
+
+    def _server_time(self):
+        try:
+            return float(self.conn.get_server_time()) or time.time()
+        except Exception:
+            return time.time()
+
+    def drain(self, asset):
+        agg = self.aggregators[asset]
+        since = self.last_seen[asset]
+        for c in self.conn.get_realtime_candles(asset, 1, since=since):
+            agg.ingest_bar(c['ts'], c['open'], c['high'], c['low'], c['close'], c.get('volume', 0) or 0)
+            since = max(since, c['ts'])
+        self.last_seen[asset] = since
+
+    def get_candles(self, asset, count=100):
+        agg = self.aggregators.get(asset)
+        if agg is None:
+            agg = self._start(asset, count)
+        elif self._overrun(asset):
+            self.reseeds += 1
+            agg = self._seed(asset, max(count, len(agg.bars)))
+        self.drain(asset)
+        return agg.candles(count)
+
+    def drop(self, asset):
+        """Unsubscribe an asset's stream and forget its bars."""
+        if self.aggregators.pop(asset, None) is None:
+            return
+        self.last_seen.pop(asset, None)
+        try:
+            self.conn.stop_stream(asset, 1)
+        except Exception as e:
+            print(f"⚠️ Could not unsubscribe {asset} stream: {e}")
+
+    def reattach(self, conn):
+        """Keep the built bars but resubscribe the streams on a new connection."""
+        self.conn = conn
+        for asset in self.aggregators:
+            try:
+                conn.start_stream(asset, 1, self.buffer)
+            except Exception as e:
+                print(f"⚠️ Could not resubscribe {asset} stream: {e}")
+
+    def memory_bytes(self):
+        return sum(agg.memory_bytes() for agg in self.aggregators.values())
+
+    def trim(self, max_bytes):
+        """Shorten every asset's bar history proportionally to fit max_bytes, keeping min_bars."""
+        used = self.memory_bytes()
+        if used <= max_bytes:
+            return
+        for agg in self.aggregators.values():
+            keep = max(int(len(agg.bars) * max_bytes / used), self.min_bars)
+            while len(agg.bars) > keep:
+                agg.bars.popleft()
+
+    def stop(self):
+        for asset in list(self.aggregators):
+            try:
+                self.conn.stop_stream(asset, 1)
+            except Exception:
+                pass
+        self.aggregators.clear()